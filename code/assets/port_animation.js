@@ -0,0 +1,80 @@
+// Clientside half of the port graph: the server sends a frame without the ships under way plus
+// their start/end positions and times, and this callback redraws them every animation tick at
+// positions interpolated from the simulated time, extrapolated from the last two server ticks.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    harbour: {
+        animatePort: function (frame, nIntervals, templates) {
+            var noUpdate = window.dash_clientside.no_update;
+            if (!frame || !templates) {
+                return noUpdate;
+            }
+            var now = Date.now();
+            var clock = window.harbourPortClock;
+            if (!clock || clock.frame !== frame) {
+                var previous = clock && clock.frame.motion;
+                var motion = frame.motion;
+                var step = previous && motion.minute > previous.minute ? motion.minute - previous.minute : 0;
+                clock = window.harbourPortClock = {
+                    frame: frame,
+                    receivedAt: now,
+                    step: step,
+                    rate: step && clock ? step / Math.max(now - clock.receivedAt, 1) : 0,
+                    drawn: false
+                };
+            }
+            var ships = frame.motion.ships;
+            if (clock.drawn && ships.length === 0) {
+                return noUpdate;
+            }
+            clock.drawn = true;
+
+            // Never run ahead of the state the next tick will bring
+            var minute = frame.motion.minute;
+            if (frame.motion.running) {
+                minute += Math.min(clock.rate * (now - clock.receivedAt), clock.step);
+            }
+
+            var shapes = [];
+            var annotations = [];
+            ships.forEach(function (ship) {
+                var progress = Math.min(1, Math.max(0, (minute - ship.start) / (ship.end - ship.start)));
+                var x = ship.from_x + (ship.to_x - ship.from_x) * progress;
+                var y = ship.from_y + (ship.to_y - ship.from_y) * progress;
+                templates.ships[ship.ship_class].forEach(function (part) {
+                    var shape = Object.assign({}, part[0]);
+                    var coords = part[1].map(function (c, i) {
+                        return c + (i % 2 === 0 ? x : y);
+                    });
+                    if (shape.type === 'path') {
+                        var next = 0;
+                        shape.path = shape.path.replace(/\{\}/g, function () {
+                            return String(coords[next++]);
+                        });
+                        shape.fillcolor = templates.colors[ship.state] || 'blue';
+                    } else {
+                        shape.x0 = coords[0];
+                        shape.y0 = coords[1];
+                        shape.x1 = coords[2];
+                        shape.y1 = coords[3];
+                    }
+                    shapes.push(shape);
+                });
+                annotations.push({x: x + 0.5, y: y + 0.4, text: String(ship.id), showarrow: false,
+                                  font: {color: 'white', size: 12, family: 'Arial Black'}});
+                if (ship.label) {
+                    annotations.push({x: x + 0.5, y: y + 1.0, text: ship.label, showarrow: false,
+                                      font: {size: 10, color: '#000', family: 'Arial', weight: 'bold'}});
+                }
+            });
+
+            var layout = frame.figure.layout;
+            return {
+                data: frame.figure.data,
+                layout: Object.assign({}, layout, {
+                    shapes: layout.shapes.concat(shapes, frame.overlay.shapes),
+                    annotations: layout.annotations.concat(annotations, frame.overlay.annotations)
+                })
+            };
+        }
+    }
+});
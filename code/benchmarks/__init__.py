@@ -0,0 +1,4 @@
+"""Reproducible throughput benchmarks of the simulation engine and the Dash rendering callbacks.
+
+Run from the ``code`` directory with ``python -m benchmarks``; see ``--help``.
+"""
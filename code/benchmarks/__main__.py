@@ -0,0 +1,73 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks.step import ARRIVAL_RATES, BERTHS, run_step_benchmarks
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark simulation stepping and Dash figure rendering.')
+    parser.add_argument('--only', choices=('step', 'render'), help='run one suite only')
+    parser.add_argument('--minutes', type=int, default=2000, help='simulated minutes per step case')
+    parser.add_argument('--repeats', type=int, default=3, help='timed repeats per case (best is kept)')
+    parser.add_argument('--quick', action='store_true', help='small grid for a fast smoke run')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<timestamp>.json)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = {'environment': environment(), 'settings': vars(args)}
+
+    if args.only != 'render':
+        grid = {'berths': (1, 20), 'arrival_rates': (10, 100)} if args.quick else \
+            {'berths': BERTHS, 'arrival_rates': ARRIVAL_RATES}
+        report['step'] = run_step_benchmarks(args.minutes, args.repeats, **grid)
+    if args.only != 'step':
+        # Imported lazily: the render suite needs Dash and Plotly, the step suite does not
+        from benchmarks.render import HISTORY_LENGTHS, QUEUE_LENGTHS, run_render_benchmarks
+
+        sizes = {'queue_lengths': (0, 100), 'history_lengths': (0, 1000)} if args.quick else \
+            {'queue_lengths': QUEUE_LENGTHS, 'history_lengths': HISTORY_LENGTHS}
+        report['render'] = run_render_benchmarks(args.repeats, **sizes)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = report['environment']['timestamp'].replace(':', '').replace('-', '')
+        output = os.path.join(RESULTS_DIR, f'{stamp}.json')
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+    print(output, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import json
+
+import plotly.utils
+
+import dash_port_simulation as view
+from benchmarks.timing import best_time
+from harbour import PortSimulation, SessionStore
+from harbour.engine import HISTORY_COLUMNS, new_series
+
+QUEUE_LENGTHS = (0, 10, 100, 1000, 5000)
+HISTORY_LENGTHS = (0, 1000, 10_000, 100_000, 1_000_000)
+
+
+def payload_size(output):
+    """Size in bytes of a callback output as serialized for the browser."""
+    return len(json.dumps(output, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def session_with_queue(queue_length, seed=0):
+    """A session whose queue holds about ``queue_length`` ships.
+
+    Bad weather from minute 0 blocks all dispatching while ships keep arriving for 100 minutes.
+    """
+    session = view.new_session()
+    session['sim'] = PortSimulation(seed=seed, arrival_rate=queue_length * 60 / 100, bad_weather_probability=1,
+                                    min_weather_duration=200, max_weather_duration=200)
+    session['sim'].run(100, sample_every=None)
+    return session
+
+
+def session_with_history(samples):
+    """A session whose metric series hold ``samples`` synthetic samples."""
+    session = view.new_session()
+    values = [float(i % 500) for i in range(samples)]
+    session['sim'].series = new_series({name: values for name in HISTORY_COLUMNS})
+    return session
+
+
+def time_callback(name, callback, session, repeats):
+    key = SessionStore.new_key()
+    view.sessions.put(key, session)
+    data = view.store_data(key, session)
+    seconds, output = best_time(lambda: callback(data), repeats)
+    view.sessions.pop(key)
+    return {'callback': name, 'seconds': seconds, 'payload_bytes': payload_size(output)}
+
+
+def run_render_benchmarks(repeats=3, queue_lengths=QUEUE_LENGTHS, history_lengths=HISTORY_LENGTHS):
+    results = []
+    for n in queue_lengths:
+        session = session_with_queue(n)
+        result = {'queue_length': len(session['sim'].queue), 'target_queue_length': n}
+        result.update(time_callback('update_graphs', view.update_graphs, session, repeats))
+        results.append(result)
+    for n in history_lengths:
+        # Without a history cursor the figures are built from the full series, as on page load
+        result = {'history_length': n}
+        result.update(time_callback('update_history_graphs', lambda data: view.update_history_graphs(data, None),
+                                    session_with_history(n), repeats))
+        results.append(result)
+    return results
@@ -0,0 +1,35 @@
+import itertools
+
+from benchmarks.timing import best_time
+from harbour import PortSimulation
+
+BERTHS = (1, 5, 10, 20, 40, 60)
+ARRIVAL_RATES = (1, 10, 20, 50, 100)
+PRIORITY = (True, False)
+
+
+def step_case(num_berths, arrival_rate, use_priority, minutes, repeats, seed=0):
+    """Simulated minutes per second of stepping one simulation minute by minute, as the web app does."""
+    def run():
+        sim = PortSimulation(seed=seed, num_berths=num_berths, arrival_rate=arrival_rate,
+                             use_priority=use_priority)
+        sim.run(minutes)
+        return sim
+
+    seconds, sim = best_time(run, repeats)
+    return {
+        'num_berths': num_berths,
+        'arrival_rate': arrival_rate,
+        'use_priority': use_priority,
+        'minutes': minutes,
+        'seconds': seconds,
+        'minutes_per_second': minutes / seconds,
+        'events': sim.events_processed,
+        'events_per_second': sim.events_processed / seconds,
+        'final_queue_length': len(sim.queue),
+    }
+
+
+def run_step_benchmarks(minutes=2000, repeats=3, berths=BERTHS, arrival_rates=ARRIVAL_RATES, priority=PRIORITY):
+    return [step_case(b, rate, prio, minutes, repeats)
+            for b, rate, prio in itertools.product(berths, arrival_rates, priority)]
@@ -0,0 +1,16 @@
+import time
+
+
+def best_time(func, repeats=3):
+    """Smallest wall-clock time of ``repeats`` calls of ``func`` and the result of the last call.
+
+    The minimum is the least noisy estimate of what the code itself costs; slower calls only add
+    scheduler and cache noise.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -1,24 +1,35 @@
 import dash
-from dash import html, dcc, Output, Input, State
+from dash import html, dcc, Output, Input, State, ClientsideFunction
 import plotly.graph_objs as go
-import pandas as pd
-import random
-from enum import Enum
+import plotly.utils
+import flask
+import collections
+import functools
 import math
+import os
+import re
+import threading
+import time
 
-
-class ShipClass(Enum):
-    SMALL = {'name': 'Small', 'priority': 1, 'size_multiplier': 0.7}
-    MEDIUM = {'name': 'Medium', 'priority': 2, 'size_multiplier': 1.0}
-    LARGE = {'name': 'Large', 'priority': 3, 'size_multiplier': 1.3}
-
-    @classmethod
-    def get_properties(cls, class_name):
-        return cls[class_name].value
+from harbour import SIMULATION_MINUTES, PortSimulation, SessionStore, ShipClass, make_params
+from harbour.analytic import estimate
+from harbour.checkpoint import load_checkpoint, save_checkpoint
+from harbour.engine import LEAVING_SPEED
+from harbour.profiling import PROFILER
+from harbour.series import minmax_decimate
+from harbour.stats import batch_means_interval, mser
+from harbour.worker import SimulationWorker
 
 
 app = dash.Dash(__name__)
 
+# A background worker advances each running simulation at the selected speed (x1 is ten simulated
+# minutes per second); the page polls the latest state every TICK_MS, and the browser redraws
+# moving ships every ANIMATION_MS by interpolating between polls.
+TICK_MS = 500
+ANIMATION_MS = 50
+SPEEDS = (1, 2, 5, 10, 100, 1000)
+
 # Initial simulation parameters
 app.layout = html.Div([
     html.H2("Port System Model", style={'textAlign': 'center', 'marginTop': '10', 'marginBottom': '10px'}),
@@ -181,10 +192,16 @@ app.layout = html.Div([
                     }, title="When enabled, larger ships are served first, followed by medium, and then small ships."),
                 ], style={'display': 'inline-block', 'marginRight': '10px'}),
             ], style={'marginBottom': '10px'}),
+            html.Div([
+                html.Label("Simulation length (minutes):", style={'display': 'inline-block', 'width': '300px'}),
+                dcc.Input(id='horizon', type='number', min=1, max=525600, step=1, value=SIMULATION_MINUTES,
+                          style={'width': '60px', 'display': 'inline-block'}),
+            ], style={'marginBottom': '10px'}),
             html.Div([
                 html.Label("Simulation speed:", style={'display': 'block', 'marginBottom': '5px'}),
-                dcc.Slider(id='sim_speed', min=1, max=10, step=1, value=1, marks={1: 'x1', 2: 'x2', 5: 'x5', 10: 'x10'},
-                           tooltip={"placement": "bottom", "always_visible": False}, updatemode='drag'),
+                # Logarithmic: the value is log10 of the speed multiplier
+                dcc.Slider(id='sim_speed', min=0, max=3, step=None, value=0,
+                           marks={math.log10(speed): f'x{speed}' for speed in SPEEDS}, updatemode='drag'),
             ], style={'marginBottom': '10px'}),
             html.Div([
                 html.Button('Start simulation', id='start_btn', n_clicks=0,
@@ -212,6 +229,19 @@ app.layout = html.Div([
                                 'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
                                 'transition': 'all 0.3s ease'
                             }),
+                html.Button('Run to end', id='run_to_end_btn', n_clicks=0,
+                            style={
+                                'marginLeft': '10px',
+                                'backgroundColor': '#2196F3',
+                                'color': 'white',
+                                'border': 'none',
+                                'padding': '8px 16px',
+                                'borderRadius': '4px',
+                                'cursor': 'pointer',
+                                'fontWeight': 'bold',
+                                'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
+                                'transition': 'all 0.3s ease'
+                            }),
             ], style={'textAlign': 'center', 'marginTop': '10px'}),
         ], style={
             'width': '400px',
@@ -228,7 +258,8 @@ app.layout = html.Div([
             dcc.Graph(id='wait-time-graph', style={'height': '250px', 'margin': '0 auto'}),
             dcc.Graph(id='utilization-graph', style={'height': '250px', 'margin': '0 auto'}),
             dcc.Graph(id='income-graph', style={'height': '250px', 'margin': '0 auto'}),
-            dcc.Interval(id='interval', interval=100, n_intervals=0, disabled=False),
+            dcc.Interval(id='interval', interval=TICK_MS, n_intervals=0, disabled=False),
+            dcc.Interval(id='animation-interval', interval=ANIMATION_MS, n_intervals=0),
             html.Div(id='status-text', style={'textAlign': 'center', 'marginTop': '100px', 'fontWeight': 'bold'}),
         ], style={
             'width': '1000px',
@@ -248,51 +279,327 @@ app.layout = html.Div([
 ], style={'background': '#f0f2f5', 'minHeight': '100vh', 'margin': '0', 'padding': '0'})
 
 
-def get_initial_state():
-    return {
-        'minute': 0,
-        'queue': [],
-        'berths': [None] * 3,
-        'moving_ships': [],
-        'leaving_ships': [],
-        'ship_id_counter': 1,
-        'time_series': [],
-        'queue_series': [],
-        'wait_time_series': [],
-        'berth_utilization': [],
-        'total_income': 0,
-        'income_series': [],
-        'total_cost': 0,
-        'cost_series': [],
-        'profit_series': [],
-        'financial_time_series': [],
-        'running': False,
-        'params': (2.0, 200, 500, 1000, 3000, 3, 30, 5, 10.0, 2.0),  # Added cost_per_container as last param
-        # Updated: arrival_rate, containers_small, containers_medium, containers_large, 
-        # berth_productivity, num_berths, pilotage_time, mooring_time, income_per_container, cost_per_container
-        'class_distribution': {'SMALL': 0.5, 'MEDIUM': 0.3, 'LARGE': 0.2},
-        'use_priority': True,
-        'bad_weather_probability': 0.1,
-        'is_bad_weather': False,
-        'weather_duration': 0,
-        'min_weather_duration': 10,
-        'max_weather_duration': 50,
-        'monthly_maintenance_cost': 50000.0,
-        'last_maintenance_update': 0
-    }
+# Simulations live on the server; the browser's dcc.Store only carries the session key. A session
+# dropped from the store (idle past its TTL, or least recently used) has its worker stopped.
+sessions = SessionStore(on_evict=lambda session: stop_worker(session))
+
+# Session keys are uuid4 hex strings minted by the server
+SESSION_KEY = re.compile(r'[0-9a-f]{32}')
+
+
+def private_directory(path):
+    """``path``, created if needed and resolved; refuses a directory another user owns or can write to."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    path = os.path.realpath(path)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise RuntimeError(f'checkpoint directory {path} must be owned by this user and not writable by others')
+    return path
+
+
+# With HARBOUR_CHECKPOINT_DIR set, running simulations are checkpointed there every CHECKPOINT_SECONDS and
+# when they stop, so a session evicted from memory or lost to a server restart resumes where it was.
+# Checkpoints untouched for as long as the session TTL are deleted.
+CHECKPOINT_DIR = os.environ.get('HARBOUR_CHECKPOINT_DIR')
+CHECKPOINT_DIR = private_directory(CHECKPOINT_DIR) if CHECKPOINT_DIR else None
+CHECKPOINT_SECONDS = 30
+
+
+# Most points a history graph trace holds before it is rebuilt from decimated data
+HISTORY_POINTS = 2000
+
+# Time-series graphs: (graph id, x series, y series of each trace)
+HISTORY_GRAPHS = [
+    ('queue-graph', 'time_series', ['queue_series']),
+    ('wait-time-graph', 'time_series', ['wait_time_series']),
+    ('utilization-graph', 'time_series', ['berth_utilization']),
+    ('income-graph', 'financial_time_series', ['income_series', 'cost_series', 'profit_series']),
+]
+
+
+def new_session(params=None, horizon=SIMULATION_MINUTES, sim=None):
+    return {'sim': sim or PortSimulation(params, horizon=horizon), 'lock': threading.Lock(), 'worker': None,
+            'run': SessionStore.new_key()}
+
+
+def is_session_key(key):
+    return isinstance(key, str) and SESSION_KEY.fullmatch(key) is not None
+
+
+def checkpoint_path(key):
+    """Checkpoint file of session ``key``; None when checkpointing is off or ``key`` is not a session key."""
+    if not CHECKPOINT_DIR or not is_session_key(key):
+        return None
+    path = os.path.realpath(os.path.join(CHECKPOINT_DIR, f'{key}.ckpt'))
+    return path if os.path.dirname(path) == CHECKPOINT_DIR else None
 
 
-app.layout.children.append(dcc.Store(id='sim-state', data=get_initial_state()))
+def remove_checkpoint(key):
+    path = checkpoint_path(key)
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
 
 
-def get_random_ship_class(state):
-    r = random.random()
-    cumulative = 0
-    for class_name, probability in state['class_distribution'].items():
-        cumulative += probability
-        if r <= cumulative:
-            return class_name
-    return 'MEDIUM'
+def sweep_checkpoints():
+    """Delete the checkpoints of sessions gone from memory and not written for the session TTL."""
+    if not CHECKPOINT_DIR:
+        return
+    live = set(sessions.keys())
+    deadline = time.time() - sessions.ttl
+    with os.scandir(CHECKPOINT_DIR) as entries:
+        for entry in entries:
+            key, ext = os.path.splitext(entry.name)
+            if ext != '.ckpt' or not is_session_key(key) or key in live:
+                continue
+            try:
+                if entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def find_session(key):
+    """The session stored under ``key``, restored from its last checkpoint if it is no longer in memory.
+
+    Only keys the server issued are looked up: a session in memory, or one whose checkpoint the
+    server wrote to its private checkpoint directory. Anything else the browser sends gives None.
+    """
+    if not is_session_key(key):
+        return None
+    session = sessions.get(key)
+    path = checkpoint_path(key)
+    if session is None and path and os.path.exists(path):
+        try:
+            session = new_session(sim=load_checkpoint(path))
+        except (OSError, ValueError):
+            return None
+        sessions.put(key, session)
+    return session
+
+
+def put_session(key, session):
+    """Store ``session`` under ``key``, dropping its checkpoint so a restore never brings back an older run.
+
+    The new session is checkpointed by its worker once it runs.
+    """
+    sessions.put(key, session)
+    remove_checkpoint(key)
+
+
+def branch_session(session, params, horizon):
+    """A session continuing ``session``'s run from its current minute with new inputs (a what-if branch).
+
+    Falls back to a fresh run when the run has not started or cannot take the new inputs.
+    """
+    with session['lock']:
+        sim = session['sim']
+        if sim.minute > 0:
+            try:
+                return new_session(sim=sim.fork(params, horizon=horizon))
+            except ValueError:
+                pass
+    return new_session(params, horizon=horizon)
+
+
+def is_valid_distribution(small, medium, large):
+    """Whether the ship class sliders add up to 100%."""
+    return small + medium + large == 100
+
+
+def speed_rate(sim_speed):
+    # Simulated minutes per second of a speed slider value
+    return round(10 ** sim_speed) * 10
+
+
+def start_worker(session, rate, key=None):
+    stop_worker(session)
+    path = checkpoint_path(key)
+    checkpoint = functools.partial(save_checkpoint, path=path) if path else None
+    session['worker'] = SimulationWorker(session['sim'], session['lock'], rate, checkpoint=checkpoint,
+                                         checkpoint_every=CHECKPOINT_SECONDS).start()
+
+
+def stop_worker(session):
+    if session['worker'] is not None:
+        session['worker'].stop()
+        session['worker'] = None
+
+
+def is_running(session):
+    return session['worker'] is not None and session['worker'].running
+
+
+# Port drawing geometry (data coordinates)
+SHIP_WIDTH = 1.0
+BERTH_WIDTH = 1.5
+BERTH_HEIGHT = 1.2
+MAX_QUEUE_IN_ROW = 8
+# Longer queues are drawn as one glyph per ship class with its count, so the figure size does not
+# grow with the queue; the default is what fits on screen (four rows)
+QUEUE_DETAIL_LIMIT = int(os.environ.get('HARBOUR_QUEUE_DETAIL_LIMIT', 4 * MAX_QUEUE_IN_ROW))
+SHIP_COLORS = {'queue': 'red', 'berth': 'orange', 'leaving': 'green'}
+
+
+def water_bounds(num_berths):
+    return -MAX_QUEUE_IN_ROW * 1.5 - 2, 0, num_berths * 2 + 7, 2.7 + 1.2
+
+
+@functools.lru_cache(maxsize=64)
+def port_scenery(num_berths):
+    # Shapes that only depend on the number of berths: water, quay, waves and the berth blocks
+    water_x0, water_y0, water_x1, water_y1 = water_bounds(num_berths)
+    shapes = [
+        dict(type='rect', x0=water_x0, y0=water_y0, x1=water_x1, y1=water_y1, fillcolor='#4fc3f7', line=dict(width=0)),
+        dict(type='rect', x0=water_x0 - 0.5, y0=0.15 - 0.5, x1=water_x1 + 0.5, y1=0.15 + 0.5, fillcolor='#ffe0b2',
+             line=dict(width=0), layer='below'),
+    ]
+    for i in range(8):
+        y = water_y0 + (water_y1 - water_y0) * (i + 1) / 10
+        shapes.append(dict(type='line', x0=water_x0 + 0.5, y0=y, x1=water_x1 - 0.5, y1=y,
+                           line=dict(color='#81d4fa', width=1, dash='dot')))
+    for i in range(num_berths):
+        x = (num_berths - 1 - i) * 2
+        shapes.append(dict(type='rect', x0=x, y0=0, x1=x + BERTH_WIDTH, y1=BERTH_HEIGHT, fillcolor='#b0bec5',
+                           line=dict(width=2, color='#78909c'), layer='above'))
+        shapes.append(dict(type='rect', x0=x, y0=BERTH_HEIGHT - 0.15, x1=x + BERTH_WIDTH, y1=BERTH_HEIGHT,
+                           fillcolor='#78909c', line=dict(width=0), layer='above'))
+    return tuple(shapes)
+
+
+@functools.lru_cache(maxsize=64)
+def port_layout(num_berths):
+    # Validated figure layout without shapes and annotations, including the default template
+    layout = go.Figure().update_layout(
+        xaxis=dict(range=[-MAX_QUEUE_IN_ROW * 1.5 - 1, num_berths * 2 + 6], showgrid=False, zeroline=False,
+                   visible=False, showline=False),
+        yaxis=dict(range=[-1.5, 5], showgrid=False, zeroline=False, visible=False, showline=False),
+        height=440,
+        margin=dict(l=10, r=10, t=10, b=10),
+        plot_bgcolor='#4fc3f7',
+        paper_bgcolor='#4fc3f7',
+    ).to_plotly_json()['layout']
+    return layout
+
+
+@functools.lru_cache(maxsize=None)
+def ship_template(ship_class_name):
+    # Shapes of a ship with its corner at the origin, as (shape, coordinates) pairs; the coordinates
+    # are x, y alternating: the hull and bow points filling the path format string, or x0, y0, x1, y1
+    size_multiplier = ShipClass.get_properties(ship_class_name)['size_multiplier']
+    x_offset = (1.0 - 1.0 * size_multiplier) / 2
+    y_offset = (0.8 - 0.8 * size_multiplier) / 2
+
+    def point(px, py):
+        return x_offset + px * size_multiplier, y_offset + py * size_multiplier
+
+    hull_points = [point(0.15, 0.45), point(0.25, 0.25), point(0.75, 0.25), point(0.85, 0.45), point(0.7, 0.65),
+                   point(0.3, 0.65)]
+    bow_points = [point(0.25, 0.25), point(0.5, 0.1), point(0.75, 0.25)]
+    hull_path = 'M ' + ' L '.join('{},{}' for _ in hull_points) + ' Z M {},{} Q {},{} {},{}'
+    return (
+        (dict(type='path', path=hull_path, line=dict(width=1, color='#222'), layer='above'),
+         tuple(c for p in hull_points + bow_points for c in p)),
+        (dict(type='rect', fillcolor='white', line=dict(width=0), layer='above'),
+         point(0.38, 0.5) + point(0.62, 0.62)),
+        (dict(type='line', line=dict(color='#ffd600', width=2), layer='above'),
+         point(0.5, 0.62) + point(0.5, 0.8)),
+        (dict(type='circle', xref='x', yref='y', fillcolor='#1976d2', line=dict(width=0), layer='above'),
+         point(0.58, 0.54) + point(0.62, 0.58)),
+    )
+
+
+def add_ship_shapes(port_shapes, x, y, ship_class_name, state='queue'):
+    # Translate the cached template of the ship class to (x, y)
+    color = SHIP_COLORS.get(state, 'blue')
+    for shape, coords in ship_template(ship_class_name):
+        coords = [c + x if i % 2 == 0 else c + y for i, c in enumerate(coords)]
+        if shape['type'] == 'path':
+            port_shapes.append(dict(shape, path=shape['path'].format(*coords), fillcolor=color))
+        else:
+            port_shapes.append(dict(shape, x0=coords[0], y0=coords[1], x1=coords[2], y1=coords[3]))
+
+
+def add_queue_summary(port_shapes, port_annotations, queue):
+    # Level-of-detail queue: a glyph and a count per ship class, largest class nearest the berths
+    counts = collections.Counter(ship['class'] for ship in queue)
+    for col, ship_class in enumerate(reversed(ShipClass)):
+        x0 = -(col + 1) * 3
+        y0 = 1.25
+        add_ship_shapes(port_shapes, x0, y0, ship_class.name, state='queue')
+        port_annotations.append(dict(x=x0 + 0.5, y=y0 + 1.2, text=f"{counts[ship_class.name]:,}", showarrow=False,
+                                     font=dict(color='white', size=16, family='Arial Black')))
+    port_annotations.append(dict(x=-5.5, y=3.6, text=f"Queue: {len(queue):,} ships", showarrow=False,
+                                 font=dict(color='#0d47a1', size=16, family='Arial', weight='bold')))
+
+
+def store_data(key, session):
+    return {'session': key, 'minute': session['sim'].minute}
+
+
+def get_session_state(data):
+    session = find_session(data['session']) if data else None
+    if session is None:
+        session = new_session()
+    with session['lock']:
+        state = session['sim'].snapshot(include_series=False)
+    state['running'] = is_running(session)
+    return state
+
+
+def steady_state(data):
+    """Warm-up (MSER-5) and steady-state queue length and utilization of a session's run so far.
+
+    Computed from the recorded series with batch-means confidence intervals, and cached until
+    the simulation advances. None while the run is too short to tell.
+    """
+    session = find_session(data['session']) if data else None
+    if session is None:
+        return None
+    with session['lock']:
+        sim = session['sim']
+        cached = session.get('steady_state')
+        if cached is not None and cached[0] == sim.minute:
+            return cached[1]
+        times = sim.series['time_series']
+        queue = sim.series['queue_series']
+        utilization = sim.series['berth_utilization']
+        result = None
+        if len(times) >= 100:
+            cut = max(mser(queue), mser(utilization))
+            result = {
+                'warmup': times[cut - 1] if cut else 0,
+                'queue': batch_means_interval(queue[cut:]),
+                'utilization': batch_means_interval(utilization[cut:]),
+            }
+        session['steady_state'] = (sim.minute, result)
+        return result
+
+
+app.layout.children.append(dcc.Store(id='sim-state', data=None))
+app.layout.children.append(dcc.Store(id='history-cursor', data=None))
+app.layout.children.append(dcc.Store(id='port-frame', data=None))
+app.layout.children.append(dcc.Store(id='ship-templates', data={
+    'colors': SHIP_COLORS,
+    'ships': {ship_class.name: ship_template(ship_class.name) for ship_class in ShipClass},
+}))
+
+app.clientside_callback(
+    ClientsideFunction(namespace='harbour', function_name='animatePort'),
+    Output('port-graph', 'figure'),
+    Input('port-frame', 'data'),
+    Input('animation-interval', 'n_intervals'),
+    State('ship-templates', 'data'),
+)
+
+
+@app.server.route('/metrics')
+def metrics():
+    # Hot-path timers and counters (filled in when HARBOUR_PROFILE is set) in Prometheus text format
+    text = PROFILER.prometheus_text({'harbour_sessions': len(sessions)})
+    return flask.Response(text, mimetype='text/plain; version=0.0.4')
 
 
 @app.callback(
@@ -318,6 +625,7 @@ def update_distribution(small, medium, large):
     Output('sim-state', 'data'),
     Input('start_btn', 'n_clicks'),
     Input('stop_btn', 'n_clicks'),
+    Input('run_to_end_btn', 'n_clicks'),
     Input('arrival_rate', 'value'),
     Input('containers_small', 'value'),
     Input('containers_medium', 'value'),
@@ -333,415 +641,170 @@ def update_distribution(small, medium, large):
     Input('large_ships_slider', 'value'),
     Input('bad_weather_slider', 'value'),
     Input('weather_duration_range', 'value'),
+    Input('horizon', 'value'),
     Input('interval', 'n_intervals'),
     State('sim-state', 'data'),
     State('income_per_container', 'value'),
     State('cost_per_container', 'value'),
+    State('maintenance_cost', 'value'),
     prevent_initial_call=False
 )
-def control_and_step_simulation(n_clicks_start, n_clicks_stop, arrival_rate, containers_small, containers_medium,
-                                containers_large, berth_productivity, pilotage_time, mooring_time, num_berths,
-                                sim_speed, use_priority, small_percent, medium_percent, large_percent, bad_weather_prob,
-                                weather_duration_range, n_intervals, state, income_per_container, cost_per_container):
+@PROFILER.profiled('control_simulation', encoder=plotly.utils.PlotlyJSONEncoder)
+def control_simulation(n_clicks_start, n_clicks_stop, n_clicks_run_to_end, arrival_rate, containers_small,
+                       containers_medium, containers_large, berth_productivity, pilotage_time, mooring_time, num_berths,
+                       sim_speed, use_priority, small_percent, medium_percent, large_percent, bad_weather_prob,
+                       weather_duration_range, horizon, n_intervals, data, income_per_container, cost_per_container,
+                       maintenance_cost):
+    params = make_params({
+        'arrival_rate': arrival_rate,
+        'containers_small': containers_small,
+        'containers_medium': containers_medium,
+        'containers_large': containers_large,
+        'berth_productivity': berth_productivity,
+        'num_berths': num_berths,
+        'pilotage_time': pilotage_time,
+        'mooring_time': mooring_time,
+        'income_per_container': income_per_container,
+        'cost_per_container': cost_per_container,
+        'monthly_maintenance_cost': maintenance_cost,
+        'class_distribution': {
+            'SMALL': small_percent / 100,
+            'MEDIUM': medium_percent / 100,
+            'LARGE': large_percent / 100
+        },
+        'use_priority': use_priority,
+        'bad_weather_probability': bad_weather_prob / 100,
+        'min_weather_duration': weather_duration_range[0],
+        'max_weather_duration': weather_duration_range[1],
+    })
+    horizon = horizon or SIMULATION_MINUTES
+
+    key = data['session'] if data else None
+    session = find_session(key)
+    if session is None:
+        key = sessions.new_key()
+        sweep_checkpoints()
+        session = new_session(params, horizon=horizon)
+        put_session(key, session)
+
     ctx = dash.callback_context
     if not ctx.triggered:
-        return True, state
+        return True, store_data(key, session)
 
     trigger = ctx.triggered[0]['prop_id'].split('.')[0]
 
     if trigger == 'stop_btn':
-        state['running'] = False
-        return True, state
+        stop_worker(session)
+        return True, store_data(key, session)
 
     if trigger == 'start_btn':
-        state = get_initial_state()
-        state['params'] = (
-            arrival_rate, containers_small, containers_medium, containers_large, berth_productivity, num_berths,
-            pilotage_time, mooring_time, income_per_container, cost_per_container)
-        state['berths'] = [None] * int(num_berths)
-        state['use_priority'] = bool(use_priority)
-        state['class_distribution'] = {
-            'SMALL': small_percent / 100,
-            'MEDIUM': medium_percent / 100,
-            'LARGE': large_percent / 100
-        }
-        state['bad_weather_probability'] = bad_weather_prob / 100
-        state['min_weather_duration'] = weather_duration_range[0]
-        state['max_weather_duration'] = weather_duration_range[1]
-        state['running'] = True
-        return False, state
-
-    if (arrival_rate, containers_small, containers_medium, containers_large, berth_productivity, num_berths,
-        pilotage_time, mooring_time, income_per_container, cost_per_container) != tuple(state['params']) or \
-            state['use_priority'] != bool(use_priority) or \
-            state['class_distribution'] != {'SMALL': small_percent / 100, 'MEDIUM': medium_percent / 100,
-                                            'LARGE': large_percent / 100} or \
-            state['bad_weather_probability'] != bad_weather_prob / 100 or \
-            state['min_weather_duration'] != weather_duration_range[0] or \
-            state['max_weather_duration'] != weather_duration_range[1]:
-        state = get_initial_state()
-        state['params'] = (
-            arrival_rate, containers_small, containers_medium, containers_large, berth_productivity, num_berths,
-            pilotage_time, mooring_time, income_per_container, cost_per_container)
-        state['berths'] = [None] * int(num_berths)
-        state['use_priority'] = bool(use_priority)
-        state['class_distribution'] = {
-            'SMALL': small_percent / 100,
-            'MEDIUM': medium_percent / 100,
-            'LARGE': large_percent / 100
-        }
-        state['bad_weather_probability'] = bad_weather_prob / 100
-        state['min_weather_duration'] = weather_duration_range[0]
-        state['max_weather_duration'] = weather_duration_range[1]
-        state['running'] = False
-        return True, state
-
-    if trigger == 'interval' and state.get('running', False):
-        t = state['minute']
-        queue = state['queue']
-        berths = state['berths']
-        moving_ships = state.get('moving_ships', [])
-        leaving_ships = state.get('leaving_ships', [])
-        ship_id_counter = state['ship_id_counter']
-        arrival_prob = arrival_rate / 60
-
-        for _ in range(sim_speed):
-            # Weather simulation
-            if state['weather_duration'] <= 0:
-                if random.random() < state['bad_weather_probability']:
-                    state['is_bad_weather'] = True
-                    state['weather_duration'] = random.randint(state['min_weather_duration'],
-                                                               state['max_weather_duration'])
-                else:
-                    state['is_bad_weather'] = False
-                    state['weather_duration'] = random.randint(state['min_weather_duration'],
-                                                               state['max_weather_duration'])
-            else:
-                state['weather_duration'] -= 1
-
-            # Ship arrival
-            if random.random() < arrival_prob:
-                ship_class = get_random_ship_class(state)
-                queue.append({
-                    'id': ship_id_counter,
-                    'class': ship_class,
-                    'arrival_time': t
-                })
-                ship_id_counter += 1
-
-            # Animate moving ships (to berth) with pilotage
-            new_moving_ships = []
-            for mship in moving_ships:
-                if mship['state'] == 'pilotage':
-                    mship['time_left'] -= 1
-                    if mship['time_left'] > 0:
-                        mship['progress'] = 1.0 - (mship['time_left'] / pilotage_time)
-                        new_moving_ships.append(mship)
-                    else:
-                        idx = mship['target_berth']
-                        berths[idx] = {
-                            'id': mship['id'],
-                            'state': 'mooring',
-                            'time_left': mooring_time,
-                            'class': mship['class']
-                        }
-            moving_ships = new_moving_ships
-
-            # Animate leaving ships
-            new_leaving_ships = []
-            for lship in leaving_ships:
-                lship['progress'] += 0.12
-                if lship['progress'] < 1.0:
-                    new_leaving_ships.append(lship)
-            leaving_ships = new_leaving_ships
-
-            # Process berths
-            for i in range(int(num_berths)):
-                if berths[i] is not None and not state['is_bad_weather']:
-                    berths[i]['time_left'] -= 1
-                    if berths[i]['time_left'] <= 0:
-                        if berths[i]['state'] == 'mooring':
-                            berths[i]['state'] = 'service'
-                            # Calculate service time based on containers and berth productivity
-                            containers = {
-                                'SMALL': containers_small,
-                                'MEDIUM': containers_medium,
-                                'LARGE': containers_large
-                            }[berths[i]['class']]
-                            total_processing_time = (containers / berth_productivity) * 60  # Convert hours to minutes
-                            berths[i]['time_left'] = total_processing_time
-                            berths[i]['containers_processed'] = 0
-                            berths[i]['total_containers'] = containers
-                            berths[i]['containers_per_minute'] = containers / total_processing_time
-                            berths[i]['last_income_update'] = 0
-                        elif berths[i]['state'] == 'service':
-                            # Calculate continuous income during service
-                            current_minute = state['minute']
-                            if 'last_income_update' in berths[i]:
-                                time_since_last_update = current_minute - berths[i]['last_income_update']
-                                if time_since_last_update > 0:
-                                    containers_processed = time_since_last_update * berths[i]['containers_per_minute']
-                                    containers_processed = min(containers_processed, berths[i]['total_containers'] - berths[i]['containers_processed'])
-                                    if containers_processed > 0:
-                                        # Calculate income and cost for processed containers
-                                        income = containers_processed * income_per_container
-                                        cost = containers_processed * cost_per_container
-                                        state['total_income'] = state.get('total_income', 0) + income
-                                        state['total_cost'] = state.get('total_cost', 0) + cost
-                                        berths[i]['containers_processed'] += containers_processed
-                                        berths[i]['last_income_update'] = current_minute
-                            berths[i]['state'] = 'unmooring'
-                            berths[i]['time_left'] = mooring_time
-                        elif berths[i]['state'] == 'unmooring':
-                            ship = berths[i]
-                            from_x = (int(num_berths) - 1 - i) * 2 + 0.25
-                            to_x = from_x + 4.0
-                            from_y = 1.25
-                            to_y = 1.25 + 2.5
-                            leaving_ships.append({
-                                'id': ship['id'],
-                                'from_x': from_x,
-                                'to_x': to_x,
-                                'from_y': from_y,
-                                'to_y': to_y,
-                                'progress': 0.0,
-                                'class': ship['class']
-                            })
-                            berths[i] = None
-
-                # Move ships from queue to free berths with pilotage
-                if (berths[i] is None and not any(m['target_berth'] == i for m in moving_ships)) and queue and not \
-                        state['is_bad_weather']:
-                    if state['use_priority']:
-                        queue.sort(key=lambda x: ShipClass.get_properties(x['class'])['priority'], reverse=True)
-                    ship = queue.pop(0)
-                    from_x = -1.5
-                    to_x = (int(num_berths) - 1 - i) * 2 + 0.25
-                    moving_ships.append({
-                        'id': ship['id'],
-                        'from_x': from_x,
-                        'to_x': to_x,
-                        'progress': 0.0,
-                        'target_berth': i,
-                        'class': ship['class'],
-                        'state': 'pilotage',
-                        'time_left': pilotage_time
-                    })
-
-        # Update metrics
-        if 'time_series' not in state:
-            state['time_series'] = []
-            state['queue_series'] = []
-            state['wait_time_series'] = []
-            state['berth_utilization'] = []
-
-        avg_wait = sum(t - ship['arrival_time'] for ship in queue) / len(queue) if queue else 0
-        occupied_berths = sum(1 for b in berths if b is not None)
-        utilization = occupied_berths / len(berths)
-
-        state['time_series'].append(t)
-        state['queue_series'].append(len(queue))
-        state['wait_time_series'].append(avg_wait)
-        state['berth_utilization'].append(utilization)
-        # Initialize financial series if they don't exist
-        if 'income_series' not in state:
-            state['income_series'] = []
-            state['cost_series'] = []
-            state['profit_series'] = []
-            state['financial_time_series'] = []
-        
-        # Always update financial metrics at each time step for accurate time tracking
-        current_income = state.get('total_income', 0)
-        current_cost = state.get('total_cost', 0)
-        
-        # Add maintenance cost every 60 minutes
-        if state['minute'] - state.get('last_maintenance_update', 0) >= 60:
-            maintenance_cost = state.get('monthly_maintenance_cost', 50000.0)
-            maintenance_per_minute = maintenance_cost / 60  # Monthly cost divided by 60*24*30 minutes
-            state['total_cost'] += maintenance_per_minute * 60  # Add cost for last hour
-            state['last_maintenance_update'] = state['minute']
-            current_cost = state.get('total_cost', 0)
-        
-        current_profit = current_income - current_cost
-        
-        # Always append new data point with current time
-        state['financial_time_series'].append(t)
-        state['income_series'].append(current_income)
-        state['cost_series'].append(current_cost)
-        state['profit_series'].append(current_profit)
-        state['minute'] = t + sim_speed
-        state['queue'] = queue
-        state['berths'] = berths
-        state['moving_ships'] = moving_ships
-        state['leaving_ships'] = leaving_ships
-        state['ship_id_counter'] = ship_id_counter
-
-        if state['minute'] >= 500:
-            state['running'] = False
-            return True, state
-
-        return False, state
-
-    return state.get('running', False), state
+        stop_worker(session)
+        session = new_session(params, horizon=horizon)
+        put_session(key, session)
+        start_worker(session, speed_rate(sim_speed), key)
+        return False, store_data(key, session)
+
+    # While the class sliders do not add up to 100% the current run goes on with its old inputs
+    valid_distribution = is_valid_distribution(small_percent, medium_percent, large_percent)
+    if valid_distribution and (params != session['sim'].params or horizon != session['sim'].horizon):
+        # Changed inputs apply from the current minute on; Start begins a fresh run
+        running = is_running(session)
+        stop_worker(session)
+        session = branch_session(session, params, horizon)
+        put_session(key, session)
+        if running:
+            start_worker(session, speed_rate(sim_speed), key)
+        return not running, store_data(key, session)
+
+    if trigger == 'run_to_end_btn' and valid_distribution and not session['sim'].finished:
+        if is_running(session):
+            session['worker'].set_rate(None)
+        else:
+            start_worker(session, None, key)
+    elif trigger == 'sim_speed' and is_running(session):
+        session['worker'].set_rate(speed_rate(sim_speed))
+
+    # Interval ticks only poll: the worker advances the simulation
+    return not is_running(session), store_data(key, session)
 
 
 @app.callback(
-    Output('port-graph', 'figure'),
-    Output('queue-graph', 'figure'),
-    Output('wait-time-graph', 'figure'),
-    Output('utilization-graph', 'figure'),
-    Output('income-graph', 'figure'),
+    Output('port-frame', 'data'),
     Output('status-text', 'children'),
-    Input('sim-state', 'data'),
-    State('num_berths', 'value'),
-    State('containers_small', 'value'),
-    State('containers_medium', 'value'),
-    State('containers_large', 'value'),
-    State('berth_productivity', 'value'),
-    State('income_per_container', 'value'),
-    State('cost_per_container', 'value')
+    Input('sim-state', 'data')
 )
-def update_graphs(state, num_berths, containers_small, containers_medium, containers_large, berth_productivity, income_per_container, cost_per_container):
+@PROFILER.profiled('update_graphs', encoder=plotly.utils.PlotlyJSONEncoder)
+def update_graphs(data):
+    state = get_session_state(data)
+    num_berths = state['params']['num_berths']
     queue = state['queue']
     berths = state['berths']
     moving_ships = state.get('moving_ships', [])
     leaving_ships = state.get('leaving_ships', [])
-    ship_width = 1.0
-    ship_height = 0.8
-    berth_width = 1.5
-    berth_height = 1.2
-    max_queue_in_row = 8
-    port_shapes = []
+    port_shapes = list(port_scenery(int(num_berths)))
     port_annotations = []
+    water_x0, water_y0, water_x1, water_y1 = water_bounds(int(num_berths))
 
-    water_y0 = 0
-    water_y1 = 2.7 + 1.2
-    water_x0 = -max_queue_in_row * 1.5 - 2
-    water_x1 = int(num_berths) * 2 + 7
-
-    port_shapes.append(
-        dict(type='rect', x0=water_x0, y0=water_y0, x1=water_x1, y1=water_y1, fillcolor='#4fc3f7', line=dict(width=0)))
-    port_shapes.append(
-        dict(type='rect', x0=water_x0 - 0.5, y0=0.15 - 0.5, x1=water_x1 + 0.5, y1=0.15 + 0.5, fillcolor='#ffe0b2',
-             line=dict(width=0), layer='below'))
-    for i in range(8):
-        y = water_y0 + (water_y1 - water_y0) * (i + 1) / 10
-        port_shapes.append(dict(type='line', x0=water_x0 + 0.5, y0=y, x1=water_x1 - 0.5, y1=y,
-                                line=dict(color='#81d4fa', width=1, dash='dot')))
-
-    def add_ship_shape(port_shapes, x, y, ship_class_name, ship_id=None, state='queue'):
-        ship_props = ShipClass.get_properties(ship_class_name)
-        size_multiplier = ship_props['size_multiplier']
-        color = {'queue': 'red', 'berth': 'orange', 'leaving': 'green'}.get(state, 'blue')
-        ship_width = 1.0 * size_multiplier
-        ship_height = 0.8 * size_multiplier
-        x_offset = (1.0 - ship_width) / 2
-        y_offset = (0.8 - ship_height) / 2
-
-        hull_points = [
-            [x + x_offset + 0.15 * size_multiplier, y + y_offset + 0.45 * size_multiplier],
-            [x + x_offset + 0.25 * size_multiplier, y + y_offset + 0.25 * size_multiplier],
-            [x + x_offset + 0.75 * size_multiplier, y + y_offset + 0.25 * size_multiplier],
-            [x + x_offset + 0.85 * size_multiplier, y + y_offset + 0.45 * size_multiplier],
-            [x + x_offset + 0.7 * size_multiplier, y + y_offset + 0.65 * size_multiplier],
-            [x + x_offset + 0.3 * size_multiplier, y + y_offset + 0.65 * size_multiplier],
-        ]
-        bow_arc = f'M {x + x_offset + 0.25 * size_multiplier},{y + y_offset + 0.25 * size_multiplier} Q {x + x_offset + 0.5 * size_multiplier},{y + y_offset + 0.1 * size_multiplier} {x + x_offset + 0.75 * size_multiplier},{y + y_offset + 0.25 * size_multiplier}'
-        hull_path = 'M ' + ' L '.join(f'{px},{py}' for px, py in hull_points) + ' Z ' + bow_arc
-        port_shapes.append(
-            dict(type='path', path=hull_path, fillcolor=color, line=dict(width=1, color='#222'), layer='above'))
-
-        port_shapes.append(
-            dict(type='rect', x0=x + x_offset + 0.38 * size_multiplier, y0=y + y_offset + 0.5 * size_multiplier,
-                 x1=x + x_offset + 0.62 * size_multiplier, y1=y + y_offset + 0.62 * size_multiplier, fillcolor='white',
-                 line=dict(width=0), layer='above'))
-        port_shapes.append(
-            dict(type='line', x0=x + x_offset + 0.5 * size_multiplier, y0=y + y_offset + 0.62 * size_multiplier,
-                 x1=x + x_offset + 0.5 * size_multiplier, y1=y + y_offset + 0.8 * size_multiplier,
-                 line=dict(color='#ffd600', width=2), layer='above'))
-        port_shapes.append(dict(type='circle', xref='x', yref='y', x0=x + x_offset + 0.58 * size_multiplier,
-                                y0=y + y_offset + 0.54 * size_multiplier,
-                                x1=x + x_offset + 0.62 * size_multiplier, y1=y + y_offset + 0.58 * size_multiplier,
-                                fillcolor='#1976d2', line=dict(width=0), layer='above'))
-
-    for idx, ship in enumerate(queue):
-        row = idx // max_queue_in_row
-        col = idx % max_queue_in_row
-        x0 = -(col + 1) * 1.5
-        y0 = 1.25 + row * 1.1
-        add_ship_shape(port_shapes, x0, y0, ship['class'], ship_id=ship['id'], state='queue')
-        port_annotations.append(dict(x=x0 + 0.5, y=y0 + 0.4, text=str(ship['id']), showarrow=False,
-                                     font=dict(color='white', size=12, family='Arial Black')))
+    if len(queue) > QUEUE_DETAIL_LIMIT:
+        add_queue_summary(port_shapes, port_annotations, queue)
+    else:
+        for idx, ship in enumerate(queue):
+            row = idx // MAX_QUEUE_IN_ROW
+            col = idx % MAX_QUEUE_IN_ROW
+            x0 = -(col + 1) * 1.5
+            y0 = 1.25 + row * 1.1
+            add_ship_shapes(port_shapes, x0, y0, ship['class'], state='queue')
+            port_annotations.append(dict(x=x0 + 0.5, y=y0 + 0.4, text=str(ship['id']), showarrow=False,
+                                         font=dict(color='white', size=12, family='Arial Black')))
 
     for i in range(int(num_berths)):
         x = (int(num_berths) - 1 - i) * 2
-        port_shapes.append(dict(type='rect', x0=x, y0=0, x1=x + berth_width, y1=berth_height, fillcolor='#b0bec5',
-                                line=dict(width=2, color='#78909c'), layer='above'))
-        port_shapes.append(
-            dict(type='rect', x0=x, y0=berth_height - 0.15, x1=x + berth_width, y1=berth_height, fillcolor='#78909c',
-                 line=dict(width=0), layer='above'))
-
         if berths[i] is None:
             port_shapes.append(
-                dict(type='rect', x0=x, y0=0, x1=x + berth_width, y1=berth_height, fillcolor='rgba(200, 200, 200, 0.3)',
+                dict(type='rect', x0=x, y0=0, x1=x + BERTH_WIDTH, y1=BERTH_HEIGHT, fillcolor='rgba(200, 200, 200, 0.3)',
                      line=dict(width=0), layer='above'))
-            port_annotations.append(dict(x=x + berth_width / 2, y=berth_height / 2, text="FREE", showarrow=False,
+            port_annotations.append(dict(x=x + BERTH_WIDTH / 2, y=BERTH_HEIGHT / 2, text="FREE", showarrow=False,
                                          font=dict(size=12, color='red', family='Arial', weight='bold')))
 
     for i in range(int(num_berths)):
         x = (int(num_berths) - 1 - i) * 2
         ship = berths[i]
         if ship is not None:
-            add_ship_shape(port_shapes, x + (berth_width - ship_width) / 2, 1.25, ship['class'], ship_id=ship['id'],
-                           state='berth')
-            port_annotations.append(dict(x=x + berth_width / 2, y=1.25 + 0.4, text=str(ship['id']), showarrow=False,
+            add_ship_shapes(port_shapes, x + (BERTH_WIDTH - SHIP_WIDTH) / 2, 1.25, ship['class'], state='berth')
+            port_annotations.append(dict(x=x + BERTH_WIDTH / 2, y=1.25 + 0.4, text=str(ship['id']), showarrow=False,
                                          font=dict(color='white', size=12, family='Arial Black')))
 
             operation_text = {'mooring': 'Mooring', 'service': 'Service', 'unmooring': 'Unmooring'}.get(ship['state'],
                                                                                                         '')
             port_annotations.append(
-                dict(x=x + berth_width / 2, y=berth_height / 2, text=operation_text, showarrow=False,
+                dict(x=x + BERTH_WIDTH / 2, y=BERTH_HEIGHT / 2, text=operation_text, showarrow=False,
                      font=dict(size=10, color='#000', family='Arial', weight='bold')))
 
-            # Calculate total time dynamically for progress bar
-            total_time = {
-                'mooring': state['params'][6],  # mooring_time
-                'service': ({
-                                'SMALL': containers_small,
-                                'MEDIUM': containers_medium,
-                                'LARGE': containers_large
-                            }[ship['class']] / berth_productivity) * 60,  # service time in minutes
-                'unmooring': state['params'][6]  # mooring_time
-            }[ship['state']]
-            progress = 1.0 - (ship['time_left'] / total_time)
-            bar_x0 = x + (berth_width - ship_width) / 2
-            bar_x1 = bar_x0 + ship_width
+            progress = 1.0 - (ship['time_left'] / ship['duration'])
+            bar_x0 = x + (BERTH_WIDTH - SHIP_WIDTH) / 2
+            bar_x1 = bar_x0 + SHIP_WIDTH
             bar_y0 = 0.05
             bar_y1 = 0.2
             port_shapes.append(
                 dict(type='rect', x0=bar_x0, y0=bar_y0, x1=bar_x1, y1=bar_y1, fillcolor='#e0e0e0', line=dict(width=0),
                      layer='above'))
-            port_shapes.append(dict(type='rect', x0=bar_x0, y0=bar_y0, x1=bar_x0 + progress * ship_width, y1=bar_y1,
+            port_shapes.append(dict(type='rect', x0=bar_x0, y0=bar_y0, x1=bar_x0 + progress * SHIP_WIDTH, y1=bar_y1,
                                     fillcolor='#26d104', line=dict(width=0), layer='above'))
 
-    for mship in moving_ships:
-        x = mship['from_x'] + (mship['to_x'] - mship['from_x']) * min(1.0, mship['progress'])
-        y = 1.25
-        add_ship_shape(port_shapes, x, y, mship['class'], ship_id=mship['id'], state='berth')
-        port_annotations.append(dict(x=x + 0.5, y=y + 0.4, text=str(mship['id']), showarrow=False,
-                                     font=dict(color='white', size=12, family='Arial Black')))
-        if mship['state'] == 'pilotage':
-            port_annotations.append(dict(x=x + 0.5, y=y + 1.0, text="Pilotage", showarrow=False,
-                                         font=dict(size=10, color='#000', family='Arial', weight='bold')))
-
-    for lship in leaving_ships:
-        x = lship['from_x'] + (lship['to_x'] - lship['from_x']) * min(1.0, lship['progress'])
-        y = lship.get('from_y', 1.25) + (lship.get('to_y', 1.25) - lship.get('from_y', 1.25)) * min(1.0,
-                                                                                                    lship['progress'])
-        add_ship_shape(port_shapes, x, y, lship['class'], ship_id=lship['id'], state='leaving')
-        port_annotations.append(dict(x=x + 0.5, y=y + 0.4, text=str(lship['id']), showarrow=False,
-                                     font=dict(color='white', size=12, family='Arial Black')))
+    # Ships under way are drawn by the browser, which interpolates their position between ticks
+    motion = [dict(id=mship['id'], ship_class=mship['class'], state='berth',
+                   label='Pilotage' if mship['state'] == 'pilotage' else None,
+                   from_x=mship['from_x'], to_x=mship['to_x'], from_y=1.25, to_y=1.25,
+                   start=mship['start'], end=mship['start'] + state['params']['pilotage_time'])
+              for mship in moving_ships]
+    motion += [dict(id=lship['id'], ship_class=lship['class'], state='leaving', label=None,
+                    from_x=lship['from_x'], to_x=lship['to_x'], from_y=lship.get('from_y', 1.25),
+                    to_y=lship.get('to_y', 1.25), start=lship['start'], end=lship['start'] + 1 / LEAVING_SPEED)
+               for lship in leaving_ships]
 
+    # Drawn over the ships under way
+    overlay_shapes = []
+    overlay_annotations = []
     if state.get('is_bad_weather', False):
         def generate_cloud_path(x0, y0, x1, y1, steps=8):
             width = x1 - x0
@@ -758,134 +821,95 @@ def update_graphs(state, num_berths, containers_small, containers_medium, contai
             path = f"M{x0},{mid_y} {path_bottom} L{x1},{y0} L{x0},{y0} Z"
             return path
 
-        port_shapes.append(dict(type="path", path=generate_cloud_path(water_x0, water_y0, water_x1, water_y1),
+        overlay_shapes.append(dict(type="path", path=generate_cloud_path(water_x0, water_y0, water_x1, water_y1),
                                 fillcolor='rgba(255, 255, 255, 0.5)', line=dict(width=0), layer='above'))
         warning_x = int(num_berths) * 2 + 2
         warning_y = 3.5
         opacity = (1.01 + math.sin(state['minute'])) / 2
-        port_shapes.append(dict(type='path',
+        overlay_shapes.append(dict(type='path',
                                 path=f'M {warning_x},{warning_y + 1.5} L {warning_x + 1.5},{warning_y} L {warning_x - 1.5},{warning_y} Z',
                                 fillcolor=f'rgba(255, 152, 0, {opacity})',
                                 line=dict(width=3, color=f'rgba(0, 0, 0, {opacity})'), layer='above'))
-        port_annotations.append(dict(x=warning_x, y=warning_y + 0.5, text="!", showarrow=False,
+        overlay_annotations.append(dict(x=warning_x, y=warning_y + 0.5, text="!", showarrow=False,
                                      font=dict(size=30, color=f'rgba(255, 255, 255, {opacity})', family='Arial Black')))
-        port_annotations.append(dict(x=warning_x, y=warning_y - 0.5, text="Bad Weather", showarrow=False,
+        overlay_annotations.append(dict(x=warning_x, y=warning_y - 0.5, text="Bad Weather", showarrow=False,
                                      font=dict(size=20, color=f'rgba(255, 0, 0, {opacity})', family='Arial')))
 
-    port_fig = go.Figure()
-    port_fig.update_layout(
-        shapes=port_shapes,
-        annotations=port_annotations,
-        xaxis=dict(range=[-max_queue_in_row * 1.5 - 1, int(num_berths) * 2 + 6], showgrid=False, zeroline=False,
-                   visible=False, showline=False),
-        yaxis=dict(range=[-1.5, 5], showgrid=False, zeroline=False, visible=False, showline=False),
-        height=440,
-        margin=dict(l=10, r=10, t=10, b=10),
-        plot_bgcolor='#4fc3f7',
-        paper_bgcolor='#4fc3f7',
-    )
-
-    # Ensure all series have the same length for queue DataFrame
-    min_length = min(len(state['time_series']), len(state['queue_series']))
-    time_series = state['time_series'][:min_length]
-    queue_series = state['queue_series'][:min_length]
-    
-    df = pd.DataFrame({
-        'Time (minutes)': time_series,
-        'Queue length': queue_series
-    })
-    queue_fig = go.Figure(data=[
-        go.Scatter(x=df['Time (minutes)'], y=df['Queue length'], mode='lines', name='Queue length')
-    ])
-    queue_fig.update_layout(
-        title='Queue Length Over Time',
-        xaxis_title='Time (minutes)',
-        yaxis_title='Number of ships',
-        height=250,
-        margin=dict(l=40, r=40, t=40, b=40),
-        plot_bgcolor='white',
-    )
-
-    # Ensure all series have the same length for metrics DataFrame
-    min_metrics_length = min(
-        len(state['time_series']), 
-        len(state['wait_time_series']), 
-        len(state['berth_utilization'])
-    )
-    time_metrics = state['time_series'][:min_metrics_length]
-    wait_times = state['wait_time_series'][:min_metrics_length]
-    utilizations = state['berth_utilization'][:min_metrics_length]
-    
-    metrics_df = pd.DataFrame({
-        'Time (minutes)': time_metrics,
-        'Average Wait Time': wait_times,
-        'Berth Utilization': utilizations
-    })
-
-    wait_time_fig = go.Figure(data=[
-        go.Scatter(x=metrics_df['Time (minutes)'], y=metrics_df['Average Wait Time'], mode='lines',
-                   name='Avg Wait Time', line=dict(color='#ff6b6b', width=2))
-    ])
-    wait_time_fig.update_layout(
-        title='Average Wait Time',
-        xaxis_title='Time (minutes)',
-        yaxis_title='Wait Time (minutes)',
-        height=250,
-        margin=dict(l=40, r=40, t=40, b=40),
-        plot_bgcolor='white',
-    )
+    # A plain figure dict: the cached layout is already validated, and validating thousands of
+    # shapes through go.Figure would cost far more than building them
+    port_fig = {'data': [], 'layout': dict(port_layout(int(num_berths)), shapes=port_shapes,
+                                           annotations=port_annotations)}
+    port_frame = {
+        'figure': port_fig,
+        'overlay': {'shapes': overlay_shapes, 'annotations': overlay_annotations},
+        'motion': {'minute': state['minute'], 'running': state['running'], 'ships': motion},
+    }
 
-    utilization_fig = go.Figure(data=[
-        go.Scatter(x=metrics_df['Time (minutes)'], y=metrics_df['Berth Utilization'], mode='lines',
-                   name='Berth Utilization', line=dict(color='#4CAF50', width=2))
-    ])
-    utilization_fig.update_layout(
-        title='Berth Utilization',
-        xaxis_title='Time (minutes)',
-        yaxis_title='Utilization',
-        height=250,
-        margin=dict(l=40, r=40, t=40, b=40),
-        plot_bgcolor='white',
-        yaxis=dict(range=[0, 1], tickformat='.0%')
-    )
+    kpis = state['kpis']
+    max_queue = kpis['max_queue']
+    avg_queue = kpis['avg_queue']
+    avg_wait = kpis['avg_wait']
+    avg_ship_wait = kpis['avg_ship_wait']
+    avg_util = kpis['avg_utilization']
+    total_income = kpis['total_income']
+    total_profit = kpis['profit']
+    profit_margin = kpis['profit_margin']
+    analytic = estimate(state['params'])
+    if analytic['stable']:
+        analytic_lines = [
+            html.Div(f"• Expected queue length: {analytic['avg_queue']:.1f} ships"),
+            html.Div(f"• Expected waiting time: {analytic['avg_wait']:.1f} minutes"),
+            html.Div(f"• Berth load: {analytic['utilization']:.1%}"),
+        ]
+    else:
+        analytic_lines = [
+            html.Div(f"• Berth load: {analytic['utilization']:.1%}: unstable, the queue grows without bound",
+                     style={'color': 'red'}),
+        ]
 
-    # Get current queue and berths
-    queue = state.get('queue', [])
-    berths = state.get('berths', [None] * 3)
-    
-    # Calculate common metrics
-    max_queue = max(state['queue_series']) if state['queue_series'] else 0
-    avg_queue = sum(state['queue_series']) / len(state['queue_series']) if state['queue_series'] else 0
-    avg_wait = sum(state['wait_time_series']) / len(state['wait_time_series']) if state['wait_time_series'] else 0
-    avg_util = sum(state['berth_utilization']) / len(state['berth_utilization']) if state['berth_utilization'] else 0
-    total_income = state.get('total_income', 0)
-    total_cost = state.get('total_cost', 0)
-    total_profit = total_income - total_cost
-    profit_margin = (total_profit / total_income * 100) if total_income > 0 else 0
-    
-    if state['minute'] >= 500 or not state.get('running', True):
+    if state['minute'] >= state['horizon'] or not state.get('running', True):
         # Show detailed statistics when simulation is finished
+        steady = steady_state(data)
+        if steady is not None:
+            steady_lines = [
+                html.Div("Steady State (after an MSER-5 warm-up of "
+                         f"{steady['warmup']:g} minutes):", style={'font-weight': 'bold'}),
+                html.Div(f"• Average queue length: {steady['queue']['mean']:.1f} "
+                         f"± {steady['queue']['half_width']:.1f} ships"),
+                html.Div(f"• Average utilization: {steady['utilization']['mean']:.1%} "
+                         f"± {steady['utilization']['half_width']:.1%}"),
+            ]
+        else:
+            steady_lines = []
         status = [
             html.Div([
-                html.H4("Simulation Results (500 minutes)", style={'color': '#1976D2', 'margin-bottom': '10px'}),
+                html.H4(f"Simulation Results ({state['minute']:g} of {state['horizon']} minutes)", style={'color': '#1976D2', 'margin-bottom': '10px'}),
                 html.Div([
                     html.Div([
                         html.Div("Queue Statistics:", style={'font-weight': 'bold'}),
                         html.Div(f"• Maximum queue length: {max_queue} ships"),
                         html.Div(f"• Average queue length: {avg_queue:.1f} ships"),
                         html.Div(f"• Average waiting time: {avg_wait:.1f} minutes"),
+                        html.Div(f"• Average wait per ship served: {avg_ship_wait:.1f} minutes"),
                     ], style={'margin-bottom': '15px'}),
                     
                     html.Div([
                         html.Div("Berth Utilization:", style={'font-weight': 'bold'}),
                         html.Div(f"• Average utilization: {avg_util:.1%}"),
                     ], style={'margin-bottom': '15px'}),
+
+                    html.Div(steady_lines, style={'margin-bottom': '15px'}),
+
+                    html.Div([
+                        html.Div("Queueing Theory Estimate (M/G/c, steady state):", style={'font-weight': 'bold'}),
+                        *analytic_lines,
+                    ], style={'margin-bottom': '15px'}),
                     
                     html.Div([
                         html.Div("Financial Summary:", style={'font-weight': 'bold'}),
                         html.Div(f"• Total Income: ${total_income:,.2f}"),
-                        html.Div(f"• Container Costs: ${total_cost - state.get('monthly_maintenance_cost', 0):,.2f}"),
-                        html.Div(f"• Maintenance Costs: ${state.get('monthly_maintenance_cost', 0):,.2f}"),
+                        html.Div(f"• Container Costs: ${kpis['container_cost']:,.2f}"),
+                        html.Div(f"• Maintenance Costs: ${kpis['maintenance_cost']:,.2f}"),
                         html.Div([
                             "• ",
                             html.Span(f"Profit: ${total_profit:,.2f} ({profit_margin:+.1f}%)", 
@@ -898,66 +922,95 @@ def update_graphs(state, num_berths, containers_small, containers_medium, contai
         ]
     else:
         # Show running status during simulation
-        current_queue = len(queue)
-        occupied_berths = sum(1 for b in berths if b is not None)
+        current_queue = kpis['queue_length']
+        occupied_berths = kpis['occupied_berths']
         status = [
             html.Div([
                 html.H4(f"Time: {state['minute']} min | " \
                 f"Queue: {current_queue} ship{'s' if current_queue != 1 else ''} | " \
                 f"Occupied berths: {occupied_berths}/{len(berths)} | " \
-                f"Profit: ${total_profit:,.2f} ({profit_margin:+.1f}%)", style={'color': '#1976D2', 'margin-bottom': '10px'})
+                f"Profit: ${total_profit:,.2f} ({profit_margin:+.1f}%)", style={'color': '#1976D2', 'margin-bottom': '10px'}),
+                html.Div(f"Simulated: wait per ship {avg_ship_wait:.1f} min, average queue {avg_queue:.1f} ships | "
+                         f"M/G/c estimate: " + (f"wait {analytic['avg_wait']:.1f} min, queue {analytic['avg_queue']:.1f} ships"
+                                                if analytic['stable'] else "unstable") +
+                         f", berth load {analytic['utilization']:.0%}", style={'color': '#555'}),
             ])
         ]
 
-    # Create financial metrics graph
-    # Use the dedicated financial time series for financial metrics
-    min_length = min(
-        len(state.get('financial_time_series', [])), 
-        len(state.get('income_series', [])), 
-        len(state.get('cost_series', [])),
-        len(state.get('profit_series', []))
+    return port_frame, status
+
+
+def build_history_figures(traces):
+    (queue_x, (queue_y,)), (wait_x, (wait_y,)), (utilization_x, (utilization_y,)) = traces[:3]
+    financial_x, financial_ys = traces[3]
+    queue_fig = go.Figure(data=[
+        go.Scatter(x=queue_x, y=queue_y, mode='lines', name='Queue length')
+    ])
+    queue_fig.update_layout(
+        title='Queue Length Over Time',
+        xaxis_title='Time (minutes)',
+        yaxis_title='Number of ships',
+        height=250,
+        margin=dict(l=40, r=40, t=40, b=40),
+        plot_bgcolor='white',
     )
-    time_series = state.get('financial_time_series', [])[:min_length]
-    income_series = state.get('income_series', [])[:min_length]
-    cost_series = state.get('cost_series', [])[:min_length]
-    profit_series = state.get('profit_series', [])[:min_length]
-    
-    financial_df = pd.DataFrame({
-        'Time (minutes)': time_series,
-        'Income ($)': income_series,
-        'Costs ($)': cost_series,
-        'Profit ($)': profit_series
-    })
-    
+
+    wait_time_fig = go.Figure(data=[
+        go.Scatter(x=wait_x, y=wait_y, mode='lines',
+                   name='Avg Wait Time', line=dict(color='#ff6b6b', width=2))
+    ])
+    wait_time_fig.update_layout(
+        title='Average Wait Time',
+        xaxis_title='Time (minutes)',
+        yaxis_title='Wait Time (minutes)',
+        height=250,
+        margin=dict(l=40, r=40, t=40, b=40),
+        plot_bgcolor='white',
+    )
+
+    utilization_fig = go.Figure(data=[
+        go.Scatter(x=utilization_x, y=utilization_y, mode='lines',
+                   name='Berth Utilization', line=dict(color='#4CAF50', width=2))
+    ])
+    utilization_fig.update_layout(
+        title='Berth Utilization',
+        xaxis_title='Time (minutes)',
+        yaxis_title='Utilization',
+        height=250,
+        margin=dict(l=40, r=40, t=40, b=40),
+        plot_bgcolor='white',
+        yaxis=dict(range=[0, 1], tickformat='.0%')
+    )
+
     financial_fig = go.Figure()
-    
+
     # Add income trace
     financial_fig.add_trace(go.Scatter(
-        x=financial_df['Time (minutes)'],
-        y=financial_df['Income ($)'],
+        x=financial_x,
+        y=financial_ys[0],
         mode='lines',
         name='Income',
         line=dict(color='#4CAF50', width=2)  # Green for income
     ))
-    
+
     # Add costs trace
     financial_fig.add_trace(go.Scatter(
-        x=financial_df['Time (minutes)'],
-        y=financial_df['Costs ($)'],
+        x=financial_x,
+        y=financial_ys[1],
         mode='lines',
         name='Costs',
         line=dict(color='#F44336', width=2)  # Red for costs
     ))
-    
+
     # Add profit trace
     financial_fig.add_trace(go.Scatter(
-        x=financial_df['Time (minutes)'],
-        y=financial_df['Profit ($)'],
+        x=financial_x,
+        y=financial_ys[2],
         mode='lines',
         name='Profit',
         line=dict(color='#2196F3', width=3, dash='dash')  # Blue dashed for profit
     ))
-    
+
     financial_fig.update_layout(
         title='Financial Metrics Over Time',
         xaxis_title='Time (minutes)',
@@ -969,19 +1022,69 @@ def update_graphs(state, num_berths, containers_small, containers_medium, contai
         legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
     )
 
-    return port_fig, queue_fig, wait_time_fig, utilization_fig, financial_fig, status
+    return queue_fig, wait_time_fig, utilization_fig, financial_fig
+
+
+def history_traces(series, budget=None):
+    # (x, [y of each trace]) per history graph, min/max-decimated to ``budget`` points per graph
+    traces = []
+    for _, x_name, y_names in HISTORY_GRAPHS:
+        x, ys = series[x_name], [series[name] for name in y_names]
+        traces.append(minmax_decimate(x, ys, budget) if budget else (list(x), [list(y) for y in ys]))
+    return traces
+
+
+def build_history_extensions(traces):
+    # extendData payloads appending the new samples to each trace of the history graphs
+    return [({'x': [x] * len(ys), 'y': ys}, list(range(len(ys)))) for x, ys in traces]
+
+
+@app.callback(
+    *[Output(graph_id, 'figure') for graph_id, _, _ in HISTORY_GRAPHS],
+    *[Output(graph_id, 'extendData') for graph_id, _, _ in HISTORY_GRAPHS],
+    Output('history-cursor', 'data'),
+    Input('sim-state', 'data'),
+    State('history-cursor', 'data')
+)
+@PROFILER.profiled('update_history_graphs', encoder=plotly.utils.PlotlyJSONEncoder)
+def update_history_graphs(data, cursor):
+    # New samples are appended with extendData until a graph would exceed HISTORY_POINTS; the
+    # graphs are then rebuilt from the whole history decimated to half the budget, so a run of any
+    # length sends and draws a bounded number of points
+    session = find_session(data['session']) if data else None
+    if session is None:
+        session = new_session()
+    same_run = cursor and cursor['run'] == session['run']
+    sent = cursor['sent'] if same_run else None
+    shown = cursor['shown'] if same_run else 0
+    with session['lock']:
+        samples = session['sim'].samples
+        rebuild = sent is None or sent > samples or shown + samples - sent > HISTORY_POINTS
+        series = session['sim'].series_since(0 if rebuild else sent)
+    no_updates = [dash.no_update] * len(HISTORY_GRAPHS)
+
+    if rebuild:
+        traces = history_traces(series, HISTORY_POINTS // 2)
+        cursor = {'run': session['run'], 'sent': samples, 'shown': max(len(x) for x, _ in traces)}
+        return (*build_history_figures(traces), *no_updates, cursor)
+    cursor = {'run': session['run'], 'sent': samples, 'shown': shown + samples - sent}
+    if sent == samples:
+        return (*no_updates, *no_updates, cursor)
+    return (*no_updates, *build_history_extensions(history_traces(series)), cursor)
 
 
 @app.callback(
     Output('start_btn', 'disabled'),
     Output('start_btn', 'style'),
+    Output('run_to_end_btn', 'disabled'),
+    Output('run_to_end_btn', 'style'),
     Input('small_ships_slider', 'value'),
     Input('medium_ships_slider', 'value'),
     Input('large_ships_slider', 'value')
 )
 def update_start_button(small, medium, large):
-    total = small + medium + large
-    if total != 100:
+    # Start and Run to end both need a class distribution adding up to 100%
+    if not is_valid_distribution(small, medium, large):
         style = {
             'marginRight': '10px',
             'backgroundColor': '#cccccc',
@@ -994,7 +1097,19 @@ def update_start_button(small, medium, large):
             'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
             'transition': 'all 0.3s ease'
         }
-        return True, style
+        run_to_end_style = {
+            'marginLeft': '10px',
+            'backgroundColor': '#cccccc',
+            'color': '#666666',
+            'border': 'none',
+            'padding': '8px 16px',
+            'borderRadius': '4px',
+            'cursor': 'not-allowed',
+            'fontWeight': 'bold',
+            'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
+            'transition': 'all 0.3s ease'
+        }
+        return True, style, True, run_to_end_style
     else:
         style = {
             'marginRight': '10px',
@@ -1008,7 +1123,19 @@ def update_start_button(small, medium, large):
             'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
             'transition': 'all 0.3s ease'
         }
-        return False, style
+        run_to_end_style = {
+            'marginLeft': '10px',
+            'backgroundColor': '#2196F3',
+            'color': 'white',
+            'border': 'none',
+            'padding': '8px 16px',
+            'borderRadius': '4px',
+            'cursor': 'pointer',
+            'fontWeight': 'bold',
+            'boxShadow': '0 2px 4px rgba(0,0,0,0.2)',
+            'transition': 'all 0.3s ease'
+        }
+        return False, style, False, run_to_end_style
 
 
 if __name__ == '__main__':
@@ -0,0 +1,5 @@
+from harbour.engine import DEFAULT_PARAMS, SIMULATION_MINUTES, PortSimulation, ShipClass, apply_overrides, make_params
+from harbour.store import SessionStore
+
+__all__ = ['DEFAULT_PARAMS', 'SIMULATION_MINUTES', 'PortSimulation', 'SessionStore', 'ShipClass', 'apply_overrides',
+           'make_params']
@@ -0,0 +1,234 @@
+import numpy as np
+
+from harbour.engine import MINUTES_PER_MONTH, SIMULATION_MINUTES, make_params
+from harbour.streams import STREAMS, derive_seed, new_seed
+
+CLASS_NAMES = ('SMALL', 'MEDIUM', 'LARGE')  # index order is priority order
+
+FREE, MOORING, SERVICE, UNMOORING = 0, 1, 2, 3
+
+ARRIVAL_CHUNK = 256  # minutes of arrival counts drawn at once
+
+
+class BatchSimulation:
+    """R independent replications of the port model advanced in lockstep with NumPy.
+
+    Every piece of per-replication state is an array: weather flags and timers of shape ``(R,)``,
+    berth phases, timers and ship classes of shape ``(R, num_berths)``, and the queue as one ring
+    buffer of arrival times per ship class, ``(R, 3, capacity)``. Each simulated minute applies the
+    weather, arrival, pilotage and berth transitions to all replications at once, so the cost of a
+    minute barely depends on R.
+
+    Time advances in whole minutes. Phases therefore last whole minutes too (a fractional service
+    time is rounded up), which is the only modelling difference with ``PortSimulation``.
+    """
+
+    def __init__(self, params=None, replications=100, seed=None, horizon=SIMULATION_MINUTES, **overrides):
+        self.params = p = make_params(params, **overrides)
+        self.replications = r = replications
+        self.horizon = horizon
+        self.minute = 0
+        self.seed = new_seed() if seed is None else seed
+        self.streams = {name: np.random.default_rng(derive_seed(self.seed, name)) for name in STREAMS}
+        b = p['num_berths']
+
+        containers = np.array([p['containers_small'], p['containers_medium'], p['containers_large']], dtype=float)
+        self._containers = containers
+        self._service_minutes = containers / p['berth_productivity'] * 60
+        self._class_cdf = np.cumsum([p['class_distribution'][name] for name in CLASS_NAMES])
+
+        self._arrival_counts = np.empty((0, r), dtype=np.int64)
+
+        self.is_bad_weather = np.zeros(r, dtype=bool)
+        self.weather_left = np.zeros(r, dtype=np.int64)
+
+        self.queue_times = np.empty((r, len(CLASS_NAMES), 64))
+        self.queue_head = np.zeros((r, len(CLASS_NAMES)), dtype=np.int64)
+        self.queue_count = np.zeros((r, len(CLASS_NAMES)), dtype=np.int64)
+        self.queue_arrival_sum = np.zeros(r)
+
+        self.pilot_class = np.full((r, b), -1, dtype=np.int64)  # -1: berth not reserved
+        self.pilot_left = np.zeros((r, b), dtype=np.int64)
+        self.berth_state = np.full((r, b), FREE, dtype=np.int8)
+        self.berth_class = np.full((r, b), -1, dtype=np.int64)
+        self.berth_left = np.zeros((r, b))
+
+        self.queue_area = np.zeros(r)
+        self.max_queue = np.zeros(r, dtype=np.int64)
+        self.busy_area = np.zeros(r)
+        self.queue_wait_area = np.zeros(r)
+        self.wait_total = np.zeros(r)
+        self.wait_count = np.zeros(r, dtype=np.int64)
+        self.wait_max = np.zeros(r)
+        self.total_income = np.zeros(r)
+        self.container_cost = np.zeros(r)
+        self.maintenance_cost = np.zeros(r)
+
+    @property
+    def finished(self):
+        return self.minute >= self.horizon
+
+    def step(self, minutes=1):
+        for _ in range(minutes):
+            self._advance_minute()
+        return self
+
+    def run(self, minutes=None):
+        end = self.horizon if minutes is None else self.minute + minutes
+        return self.step(max(0, end - self.minute))
+
+    def kpis(self):
+        """Return the results-panel KPIs as arrays with one value per replication."""
+        minutes = max(self.minute, 1)
+        total_cost = self.container_cost + self.maintenance_cost
+        profit = self.total_income - total_cost
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_ship_wait = np.where(self.wait_count > 0, self.wait_total / self.wait_count, 0.0)
+            profit_margin = np.where(self.total_income > 0, profit / self.total_income * 100, 0.0)
+        return {
+            'max_queue': self.max_queue.copy(),
+            'avg_queue': self.queue_area / minutes,
+            'avg_wait': self.queue_wait_area / minutes,
+            'avg_ship_wait': avg_ship_wait,
+            'max_wait': self.wait_max.copy(),
+            'ships_served': self.wait_count.copy(),
+            'avg_utilization': self.busy_area / (minutes * self.params['num_berths']),
+            'total_income': self.total_income.copy(),
+            'container_cost': self.container_cost.copy(),
+            'maintenance_cost': self.maintenance_cost.copy(),
+            'total_cost': total_cost,
+            'profit': profit,
+            'profit_margin': profit_margin,
+        }
+
+    def _advance_minute(self):
+        p = self.params
+        t = self.minute
+        streams = self.streams
+        r = self.replications
+
+        # Weather simulation
+        redraw = self.weather_left <= 0
+        n = np.count_nonzero(redraw)
+        if n:
+            self.is_bad_weather[redraw] = streams['weather_occurrence'].random(n) < p['bad_weather_probability']
+            durations = streams['weather_duration'].integers(p['min_weather_duration'],
+                                                             p['max_weather_duration'] + 1, n)
+            self.weather_left[redraw] = np.maximum(durations, 1)
+        self.weather_left -= 1
+
+        # Ship arrivals: Poisson counts per minute, enqueued one round per ship so rows stay unique
+        counts = self._next_arrival_counts()
+        for k in range(1, counts.max(initial=0) + 1):
+            arriving = np.nonzero(counts >= k)[0]
+            classes = np.searchsorted(self._class_cdf, streams['ship_class'].random(arriving.size),
+                                      side='left')
+            classes[classes >= len(CLASS_NAMES)] = 1  # rounding slack in the distribution: MEDIUM
+            self._enqueue(arriving, classes, t)
+
+        # Pilotage goes on in bad weather
+        piloting = self.pilot_class >= 0
+        self.pilot_left[piloting] -= 1
+        docked = piloting & (self.pilot_left <= 0)
+        if docked.any():
+            self.berth_state[docked] = MOORING
+            self.berth_left[docked] = p['mooring_time']
+            self.berth_class[docked] = self.pilot_class[docked]
+            self.pilot_class[docked] = -1
+
+        # Berth operations halt in bad weather
+        working = (self.berth_state != FREE) & ~self.is_bad_weather[:, None]
+        self.berth_left[working] -= 1
+        done = working & (self.berth_left <= 0)
+        if done.any():
+            state = self.berth_state
+            mooring_done = done & (state == MOORING)
+            service_done = done & (state == SERVICE)
+            unmooring_done = done & (state == UNMOORING)
+
+            state[mooring_done] = SERVICE
+            self.berth_left[mooring_done] = self._service_minutes[self.berth_class[mooring_done]]
+
+            handled = np.where(service_done, self._containers[self.berth_class], 0.0).sum(axis=1)
+            self.total_income += handled * p['income_per_container']
+            self.container_cost += handled * p['cost_per_container']
+            state[service_done] = UNMOORING
+            self.berth_left[service_done] = p['mooring_time']
+
+            state[unmooring_done] = FREE
+            self.berth_class[unmooring_done] = -1
+
+        # Move ships from queue to free berths with pilotage, lowest berth index first
+        waiting = self.queue_count.sum(axis=1)
+        can_dispatch = ~self.is_bad_weather & (waiting > 0)
+        if can_dispatch.any():
+            for b in range(p['num_berths']):
+                rows = np.nonzero(can_dispatch & (self.berth_state[:, b] == FREE) & (self.pilot_class[:, b] < 0))[0]
+                if rows.size == 0:
+                    continue
+                classes, arrival = self._dequeue(rows)
+                waits = t - arrival
+                self.wait_total[rows] += waits
+                self.wait_count[rows] += 1
+                self.wait_max[rows] = np.maximum(self.wait_max[rows], waits)
+                self.pilot_class[rows, b] = classes
+                self.pilot_left[rows, b] = p['pilotage_time']
+                waiting[rows] -= 1
+                can_dispatch &= waiting > 0
+                if not can_dispatch.any():
+                    break
+
+        if t > 0 and t % 60 == 0:
+            self.maintenance_cost += p['monthly_maintenance_cost'] / MINUTES_PER_MONTH * 60
+
+        queue_length = self.queue_count.sum(axis=1)
+        self.queue_area += queue_length
+        # Mean wait of the queued ships, at the middle of the minute
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.queue_wait_area += np.where(queue_length > 0,
+                                             t + 0.5 - self.queue_arrival_sum / queue_length, 0.0)
+        np.maximum(self.max_queue, queue_length, out=self.max_queue)
+        self.busy_area += np.count_nonzero(self.berth_state != FREE, axis=1)
+        self.minute = t + 1
+
+    def _next_arrival_counts(self):
+        # Arrival counts of the whole batch are drawn ARRIVAL_CHUNK minutes ahead in one call
+        t = self.minute % ARRIVAL_CHUNK
+        if t == 0 or len(self._arrival_counts) == 0:
+            self._arrival_counts = self.streams['arrivals'].poisson(self.params['arrival_rate'] / 60,
+                                                                    (ARRIVAL_CHUNK, self.replications))
+        return self._arrival_counts[t]
+
+    def _enqueue(self, rows, classes, t):
+        capacity = self.queue_times.shape[2]
+        if (self.queue_count[rows, classes] >= capacity).any():
+            self._grow_queue()
+            capacity = self.queue_times.shape[2]
+        position = (self.queue_head[rows, classes] + self.queue_count[rows, classes]) % capacity
+        self.queue_times[rows, classes, position] = t
+        self.queue_count[rows, classes] += 1
+        self.queue_arrival_sum[rows] += t
+
+    def _dequeue(self, rows):
+        # Next ship per row: highest non-empty class with priority on, earliest arrival otherwise
+        capacity = self.queue_times.shape[2]
+        counts = self.queue_count[rows]
+        if self.params['use_priority']:
+            classes = len(CLASS_NAMES) - 1 - np.argmax(counts[:, ::-1] > 0, axis=1)
+        else:
+            heads = np.take_along_axis(self.queue_times[rows], self.queue_head[rows][:, :, None], axis=2)[:, :, 0]
+            classes = np.argmin(np.where(counts > 0, heads, np.inf), axis=1)
+        head = self.queue_head[rows, classes]
+        arrival = self.queue_times[rows, classes, head]
+        self.queue_head[rows, classes] = (head + 1) % capacity
+        self.queue_count[rows, classes] -= 1
+        self.queue_arrival_sum[rows] -= arrival
+        return classes, arrival
+
+    def _grow_queue(self):
+        # Unroll every ring buffer to start at index 0, then double the capacity
+        capacity = self.queue_times.shape[2]
+        order = (self.queue_head[:, :, None] + np.arange(capacity)) % capacity
+        unrolled = np.take_along_axis(self.queue_times, order, axis=2)
+        self.queue_times = np.concatenate([unrolled, np.empty_like(unrolled)], axis=2)
+        self.queue_head[:] = 0
@@ -0,0 +1,46 @@
+import os
+import pickle
+import zlib
+
+from harbour.engine import HISTORY_COLUMNS, PortSimulation
+
+# Leading bytes of a checkpoint, with the format version
+MAGIC = b'HARBOUR-CHECKPOINT\x03'
+
+
+def dumps(sim, level=1):
+    """Serialize the full state of ``sim`` (entities, random streams, statistics, metric series).
+
+    The snapshot is pickled with the metric columns as raw arrays and compressed with zlib at
+    ``level`` (1 favours speed; series compress well at any level).
+    """
+    state = sim.snapshot(include_series=False)
+    del state['kpis']
+    state['series'] = {name: sim.series[name] for name in HISTORY_COLUMNS}
+    return MAGIC + zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), level)
+
+
+def loads(data):
+    """Rebuild a simulation from ``dumps`` output. Like any pickle, only load checkpoints you wrote."""
+    if not data.startswith(MAGIC):
+        raise ValueError('not a harbour checkpoint (or written by an incompatible version)')
+    try:
+        state = pickle.loads(zlib.decompress(data[len(MAGIC):]))
+    except (zlib.error, pickle.UnpicklingError, EOFError) as exc:
+        raise ValueError(f'corrupt harbour checkpoint: {exc}') from exc
+    return PortSimulation.from_snapshot(state)
+
+
+def save_checkpoint(sim, path, level=1):
+    # Write-then-rename, so a crash while saving never leaves a truncated checkpoint behind
+    data = dumps(sim, level)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
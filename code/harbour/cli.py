@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import csv
+import json
+import math
+import sys
+
+from harbour.analytic import estimate
+from harbour.checkpoint import load_checkpoint, save_checkpoint
+from harbour.engine import EVENT_FIELDS, SAMPLE_FIELDS, SIMULATION_MINUTES, PortSimulation, apply_overrides
+from harbour.config import load_scenario
+from harbour.replications import KPI_NAMES, PANEL_KPI_NAMES, compare_scenarios, run_replications, run_until_precise
+from harbour.sinks import open_sink
+from harbour.sweep import pareto_front, run_sweep, sweep_figures, tidy_row, write_csv
+
+
+def parse_override(text):
+    """Parse ``NAME=VALUE``; VALUE is read as JSON when possible, e.g. ``num_berths=4``."""
+    name, sep, value = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return name, value
+
+
+def parse_grid(text):
+    """Parse ``NAME=V1,V2,...`` or the inclusive range ``NAME=START:STOP:STEP``."""
+    name, value = parse_override(text)
+    if isinstance(value, str) and value.count(':') == 2:
+        start, stop, step = (json.loads(part) for part in value.split(':'))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"range step must be positive in {text!r}")
+        count = int(round((stop - start) / step)) + 1
+        return name, [start + i * step for i in range(count)]
+    if isinstance(value, str):
+        return name, [json.loads(part) if part.strip() else part for part in value.split(',')]
+    return name, [value]
+
+
+def parse_warmup(text):
+    """Parse a warm-up length in minutes, or ``auto`` to detect it with MSER-5."""
+    if text == 'auto':
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected minutes or 'auto', got {text!r}") from None
+
+
+def add_precision_arguments(parser):
+    parser.add_argument('--warmup', type=parse_warmup, metavar='MINUTES|auto',
+                        help='simulate this long before measuring; auto detects it with MSER-5 on pilot runs')
+    parser.add_argument('--tolerance', type=float,
+                        help='add replications until the confidence interval half-widths of average wait and '
+                             'utilization are within this fraction of their means, e.g. 0.05')
+    parser.add_argument('--max-replications', type=int,
+                        help='stop adding replications here when --tolerance is not met (default: 1000)')
+
+
+def replications_for(args, params, kpi_names):
+    """Run fixed replications, or sequential ones with ``--tolerance``."""
+    if args.tolerance:
+        return run_until_precise(params, args.tolerance, args.minutes, args.workers, args.seed, args.level, kpi_names,
+                                 args.warmup, batch=args.replications,
+                                 max_replications=args.max_replications or 1000)
+    return run_replications(params, args.replications, args.minutes, args.workers, args.seed, args.level,
+                            kpi_names, args.warmup)
+
+
+def parse_utilization_range(text):
+    """Parse ``LOW:HIGH`` utilization bounds, e.g. ``0.3:1``."""
+    low, sep, high = text.partition(':')
+    try:
+        return float(low), float(high) if sep else 1.0
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LOW:HIGH, got {text!r}") from None
+
+
+def add_scenario_arguments(parser):
+    parser.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                        metavar='NAME=VALUE', help='override a simulation parameter (repeatable)')
+    parser.add_argument('--minutes', type=int, default=SIMULATION_MINUTES, help='simulated minutes per run')
+    parser.add_argument('--seed', type=int, default=None, help='master random seed')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+
+
+def finite(value):
+    """``value`` with every infinite or NaN float replaced by None, which JSON can represent."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [finite(item) for item in value]
+    return value
+
+
+def write_json(result, stream=None):
+    json.dump(finite(result), stream or sys.stdout, indent=2, allow_nan=False)
+    (stream or sys.stdout).write('\n')
+
+
+def replicate_command(args):
+    params = apply_overrides(None, args.overrides)
+    write_json(replications_for(args, params, KPI_NAMES))
+
+
+def compare_command(args):
+    base = apply_overrides(None, args.overrides)
+    alternative = apply_overrides(base, args.alternative)
+    write_json(compare_scenarios(base, alternative, args.replications, args.minutes, args.workers, args.seed,
+                                 args.level))
+
+
+def sweep_command(args):
+    ranges = dict(args.grid)
+    params = apply_overrides(None, args.overrides)
+    rows = run_sweep(ranges, params, args.replications, args.minutes, args.workers, args.seed, args.level,
+                     args.cache_dir, args.prune)
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.html:
+        x, y = (list(ranges) * 2)[:2]
+        with open(args.html, 'w') as f:
+            for fig in sweep_figures(rows, x, y):
+                f.write(fig.to_html(full_html=False, include_plotlyjs='cdn'))
+    write_json({'rows': rows, 'pareto_front': pareto_front(rows)})
+
+
+def estimate_command(args):
+    params = apply_overrides(None, args.overrides)
+    write_json({'params': params, 'estimate': estimate(params)})
+
+
+def record_command(args):
+    resumed = None
+    if args.resume:
+        # A missing or corrupt checkpoint, or an override the saved state cannot take (removing a busy berth)
+        try:
+            saved = load_checkpoint(args.resume)
+            horizon = saved.horizon if args.minutes is None else args.minutes
+            if horizon < saved.minute:
+                raise ValueError(f'--minutes {horizon} is before the checkpoint, saved at minute {saved.minute:g}')
+            params = apply_overrides(saved.params, args.overrides)
+            resumed = saved.fork(params, horizon=horizon)
+        except (OSError, ValueError) as exc:
+            sys.exit(f'harbour record: error: cannot resume {args.resume}: {exc}')
+    else:
+        horizon = SIMULATION_MINUTES if args.minutes is None else args.minutes
+        params = apply_overrides(None, args.overrides)
+    with contextlib.ExitStack() as stack:
+        sink = stack.enter_context(open_sink(args.samples, SAMPLE_FIELDS, args.chunk_rows)) if args.samples else None
+        event_sink = stack.enter_context(open_sink(args.events, EVENT_FIELDS, args.chunk_rows)) if args.events else None
+        if resumed:
+            sim = resumed
+            sim.sink, sim.event_sink, sim.keep_history = sink, event_sink, False
+        else:
+            sim = PortSimulation(params, seed=args.seed, horizon=horizon, sink=sink, event_sink=event_sink,
+                                 keep_history=False)
+        every = args.checkpoint_every if args.checkpoint else None
+        while not sim.finished:
+            sim.run(min(every or sim.horizon, sim.horizon - sim.minute), sample_every=args.every if sink else None)
+            if args.checkpoint:
+                save_checkpoint(sim, args.checkpoint)
+    write_json({'params': params, 'minutes': horizon, 'seed': sim.seed, 'kpis': sim.kpis()})
+
+
+def flatten(params, prefix=''):
+    """``{'class_distribution': {'LARGE': 0.2}}`` -> ``{'class_distribution.LARGE': 0.2}``."""
+    flat = {}
+    for name, value in params.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{name}.'))
+        else:
+            flat[prefix + name] = value
+    return flat
+
+
+def run_command(args):
+    params, settings = load_scenario(args.config) if args.config else (apply_overrides(None, ()), {})
+    params = apply_overrides(params, args.overrides)
+    for name, default in (('minutes', SIMULATION_MINUTES), ('replications', 30), ('workers', None), ('seed', None),
+                          ('level', 0.95), ('warmup', 0), ('tolerance', None), ('max_replications', None)):
+        if getattr(args, name) is None:
+            setattr(args, name, settings.get(name, default))
+    result = replications_for(args, params, PANEL_KPI_NAMES)
+    if args.format == 'csv':
+        row = tidy_row(flatten(params), result['kpis'])
+        row.update(replications=result['replications'], minutes=result['minutes'], warmup=result['warmup'],
+                   seed=result['seed'])
+        if args.output:
+            write_csv([row], args.output)
+        else:
+            writer = csv.DictWriter(sys.stdout, fieldnames=list(row))
+            writer.writeheader()
+            writer.writerow(row)
+    elif args.output:
+        with open(args.output, 'w') as f:
+            write_json(result, f)
+    else:
+        write_json(result)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='harbour', description='Headless port simulation runs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    replicate = commands.add_parser('replicate', help='run independent replications of one scenario')
+    add_scenario_arguments(replicate)
+    replicate.add_argument('-n', '--replications', type=int, default=30,
+                           help='replications (with --tolerance: replications added per round)')
+    replicate.add_argument('--level', type=float, default=0.95, help='confidence level of the intervals')
+    add_precision_arguments(replicate)
+    replicate.set_defaults(handler=replicate_command)
+
+    compare = commands.add_parser('compare', help='compare two scenarios under common random numbers')
+    add_scenario_arguments(compare)
+    compare.add_argument('--alt', dest='alternative', action='append', type=parse_override, required=True,
+                         metavar='NAME=VALUE', help='parameter that differs in the alternative scenario (repeatable)')
+    compare.add_argument('-n', '--replications', type=int, default=30)
+    compare.add_argument('--level', type=float, default=0.95, help='confidence level of the intervals')
+    compare.set_defaults(handler=compare_command)
+
+    run = commands.add_parser('run', help='run replications of a scenario file and report the results-panel KPIs')
+    run.add_argument('--config', help='scenario file (.yaml/.yml or .json) with parameters and run settings')
+    run.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                     metavar='NAME=VALUE', help='override a scenario parameter (repeatable)')
+    run.add_argument('--minutes', type=int, help=f'simulated minutes per run (default: {SIMULATION_MINUTES})')
+    run.add_argument('-n', '--replications', type=int,
+                     help='independent replications, or per round with --tolerance (default: 30)')
+    run.add_argument('--workers', type=int, help='worker processes (default: all cores)')
+    run.add_argument('--seed', type=int, help='master random seed')
+    run.add_argument('--level', type=float, help='confidence level of the intervals (default: 0.95)')
+    add_precision_arguments(run)
+    run.add_argument('--format', choices=('json', 'csv'), default='json', help='output format')
+    run.add_argument('-o', '--output', help='output file (default: standard output)')
+    run.set_defaults(handler=run_command)
+
+    sweep = commands.add_parser('sweep', help='run a grid of scenarios and compare wait time with profit')
+    add_scenario_arguments(sweep)
+    sweep.add_argument('--grid', action='append', type=parse_grid, required=True,
+                       metavar='NAME=V1,V2,...|NAME=START:STOP:STEP', help='parameter values to sweep (repeatable)')
+    sweep.add_argument('-n', '--replications', type=int, default=10)
+    sweep.add_argument('--level', type=float, default=0.95, help='confidence level of the intervals')
+    sweep.add_argument('--cache-dir',
+                       help='keep finished points here and skip them when resuming '
+                            '(the master seed of the first run is kept too and reused without --seed)')
+    sweep.add_argument('--prune', type=parse_utilization_range, metavar='LOW:HIGH',
+                       help='skip points whose estimated utilization is below LOW or at least HIGH (e.g. 0.3:1)')
+    sweep.add_argument('--csv', help='also write the results table to this CSV file')
+    sweep.add_argument('--html', help='write wait/profit heatmaps and the Pareto front here (needs Plotly)')
+    sweep.set_defaults(handler=sweep_command)
+
+    estimate_parser = commands.add_parser('estimate', help='queueing-theory estimate of a scenario, without simulating')
+    estimate_parser.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                                 metavar='NAME=VALUE', help='override a simulation parameter (repeatable)')
+    estimate_parser.set_defaults(handler=estimate_command)
+
+    record = commands.add_parser('record', help='run one long simulation, streaming its records to CSV or Parquet')
+    record.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                        metavar='NAME=VALUE', help='override a simulation parameter (repeatable)')
+    record.add_argument('--minutes', type=int,
+                        help=f'simulation horizon (default: {SIMULATION_MINUTES}, or the horizon of --resume)')
+    record.add_argument('--seed', type=int, default=None, help='random seed')
+    record.add_argument('--samples', help='write a metrics sample every --every minutes here (.csv or .parquet)')
+    record.add_argument('--every', type=int, default=1, help='minutes between metrics samples')
+    record.add_argument('--events', help='write one record per simulation event here (.csv or .parquet)')
+    record.add_argument('--chunk-rows', type=int, default=None, help='rows buffered before each write')
+    record.add_argument('--checkpoint', help='save the full simulation state here as it runs (binary, see --resume)')
+    record.add_argument('--checkpoint-every', type=int, default=1440, help='simulated minutes between checkpoints')
+    record.add_argument('--resume', help='continue the run saved in this checkpoint up to --minutes (default: its '
+                                         'own horizon); --set parameters apply from the checkpoint on (a what-if '
+                                         'branch)')
+    record.set_defaults(handler=record_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
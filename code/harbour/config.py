@@ -0,0 +1,40 @@
+import json
+import os
+
+from harbour.engine import DEFAULT_PARAMS, make_params
+
+# Run settings a scenario file may carry next to the simulation parameters
+RUN_SETTINGS = ('minutes', 'replications', 'workers', 'seed', 'level', 'warmup', 'tolerance', 'max_replications')
+
+
+def read_config(path):
+    """Read a YAML (needs PyYAML) or JSON mapping, chosen by the extension of ``path``."""
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise ImportError('Reading YAML scenarios needs PyYAML: pip install pyyaml') from exc
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: a scenario must be a mapping, got {type(data).__name__}')
+    return data
+
+
+def load_scenario(path):
+    """Return ``(params, settings)`` of a scenario file.
+
+    Simulation parameters are the keys of ``DEFAULT_PARAMS``, either at the top level or under
+    ``params``; unspecified ones keep their defaults. ``settings`` holds the run settings found
+    (``minutes``, ``replications``, ``workers``, ``seed``, ``level``, ``warmup``, ``tolerance``,
+    ``max_replications``).
+    """
+    data = read_config(path)
+    params = dict(data.get('params', {}))
+    params.update((name, value) for name, value in data.items() if name in DEFAULT_PARAMS)
+    unknown = set(data) - set(DEFAULT_PARAMS) - set(RUN_SETTINGS) - {'params'}
+    if unknown:
+        raise ValueError(f"{path}: unknown scenario keys: {', '.join(sorted(unknown))}")
+    return make_params(params), {name: data[name] for name in RUN_SETTINGS if name in data}
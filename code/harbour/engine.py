@@ -0,0 +1,548 @@
+import heapq
+import math
+from enum import Enum
+
+from harbour.entities import (CLASS_CODES, CLASS_NAMES, MEDIUM, MOORING, SERVICE, UNMOORING, Berth, LeavingShip,
+                               MovingShip, Ship)
+from harbour.events import (ARRIVAL, LEAVE_END, MAINTENANCE, MOORING_END, PILOTAGE_END, SERVICE_END,
+                            UNMOORING_END, WEATHER, EventCalendar)
+from harbour.profiling import PROFILER
+from harbour.queues import ShipQueue
+from harbour.series import column
+from harbour.stats import QueueWaitStat, RunningStat, TimeWeightedStat
+from harbour.streams import ArrivalStream, new_seed, spawn_streams
+
+
+class ShipClass(Enum):
+    SMALL = {'name': 'Small', 'priority': 1, 'size_multiplier': 0.7}
+    MEDIUM = {'name': 'Medium', 'priority': 2, 'size_multiplier': 1.0}
+    LARGE = {'name': 'Large', 'priority': 3, 'size_multiplier': 1.3}
+
+    @classmethod
+    def get_properties(cls, class_name):
+        return cls[class_name].value
+
+
+# Queue priority by ship class code (see harbour.entities)
+CLASS_PRIORITY = tuple(ShipClass[name].value['priority'] for name in CLASS_NAMES)
+
+# Same defaults as the inputs of the web UI
+DEFAULT_PARAMS = {
+    'arrival_rate': 20,
+    'containers_small': 500,
+    'containers_medium': 2000,
+    'containers_large': 5000,
+    'berth_productivity': 3000,
+    'num_berths': 3,
+    'pilotage_time': 30,
+    'mooring_time': 5,
+    'income_per_container': 10.0,
+    'cost_per_container': 2.0,
+    'monthly_maintenance_cost': 50000.0,
+    'class_distribution': {'SMALL': 0.5, 'MEDIUM': 0.3, 'LARGE': 0.2},
+    'use_priority': True,
+    'bad_weather_probability': 0.1,
+    'min_weather_duration': 10,
+    'max_weather_duration': 50,
+}
+
+SIMULATION_MINUTES = 500
+
+# Maintenance is budgeted per 30-day month and charged every hour
+MINUTES_PER_MONTH = 30 * 24 * 60
+
+# Leaving ships sail off at this fraction of the animation per minute
+LEAVING_SPEED = 0.12
+LEAVING_MINUTES = math.ceil(1 / LEAVING_SPEED)
+
+# Event ending each berth phase, by phase code
+PHASE_END_EVENTS = (MOORING_END, SERVICE_END, UNMOORING_END)
+
+# Columns of one metrics sample, in the order they are recorded (see PortSimulation._record_metrics)
+HISTORY_COLUMNS = ('time_series', 'queue_series', 'wait_time_series', 'berth_utilization', 'income_series',
+                   'cost_series', 'profit_series')
+SAMPLE_FIELDS = (('minute', 'float'), ('queue_length', 'int'), ('current_wait', 'float'), ('utilization', 'float'),
+                 ('total_income', 'float'), ('total_cost', 'float'), ('profit', 'float'))
+EVENT_FIELDS = (('minute', 'float'), ('kind', 'str'), ('berth', 'int'), ('queue_length', 'int'))
+
+
+def new_series(state=None):
+    """Metric columns, empty or restored from a snapshot; the financial x axis shares the time column."""
+    series = {name: column((state or {}).get(name, ())) for name in HISTORY_COLUMNS}
+    series['financial_time_series'] = series['time_series']
+    return series
+
+
+def ship_priority(ship):
+    return CLASS_PRIORITY[ship.ship_class]
+
+
+def make_params(params=None, **overrides):
+    """Return a full parameter dict: defaults, updated with ``params`` and then ``overrides``."""
+    merged = dict(DEFAULT_PARAMS)
+    merged.update(params or {})
+    merged.update(overrides)
+    unknown = set(merged) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown simulation parameters: {', '.join(sorted(unknown))}")
+    merged['class_distribution'] = dict(merged['class_distribution'])
+    merged['num_berths'] = int(merged['num_berths'])
+    merged['use_priority'] = bool(merged['use_priority'])
+    return merged
+
+
+def apply_overrides(params, overrides):
+    """Return ``params`` with ``(name, value)`` overrides applied; dotted names reach into dicts,
+    e.g. ``class_distribution.LARGE``."""
+    params = make_params(params)
+    for name, value in overrides:
+        target = params
+        *parents, leaf = name.split('.')
+        for parent in parents:
+            target = target[parent]
+        target[leaf] = value
+    return make_params(params)
+
+
+class PortSimulation:
+    """Headless port model: weather, arrivals, pilotage, berth operations and finance.
+
+    Does not depend on Dash, Plotly or pandas. The web app advances it one interval tick at a
+    time with ``step``; batch jobs call ``run`` directly.
+
+    The model is discrete-event: every state change is an entry in a heap-ordered event calendar
+    and the clock jumps from one event to the next, so quiet stretches such as a long service
+    phase cost nothing.
+    """
+
+    def __init__(self, params=None, seed=None, horizon=SIMULATION_MINUTES, sink=None, event_sink=None,
+                 keep_history=True, **overrides):
+        self.params = make_params(params, **overrides)
+        p = self.params
+        # Per-class constants by class code, and the cumulative class distribution in input order
+        self.class_containers = (p['containers_small'], p['containers_medium'], p['containers_large'])
+        self._class_thresholds = []
+        cumulative = 0
+        for class_name, probability in p['class_distribution'].items():
+            cumulative += probability
+            self._class_thresholds.append((cumulative, CLASS_CODES[class_name]))
+        self.seed = new_seed() if seed is None else seed
+        self.streams = spawn_streams(self.seed)
+        self.horizon = horizon
+        # Optional record sinks (see harbour.sinks): one SAMPLE_FIELDS row per metrics sample and
+        # one EVENT_FIELDS row per processed event. Without the in-memory history, memory stays
+        # bounded however long the run.
+        self.sink = sink
+        self.event_sink = event_sink
+        self.keep_history = keep_history
+        self.minute = 0
+        self.queue = self._new_queue()
+        self.berths = [None] * self.params['num_berths']
+        # Berth index: free berths (a heap, lowest index is offered first), berths reserved by a
+        # ship in pilotage (the moving ship by target berth) and occupied berths (self.berths)
+        self.free_berths = list(range(self.params['num_berths']))
+        self.moving_ships = {}
+        self.leaving_ships = []
+        self.ship_id_counter = 1
+        self.is_bad_weather = False
+        self.weather_until = 0
+        self.total_income = 0
+        self.container_cost = 0
+        self.maintenance_cost = 0
+        self.events_processed = 0
+        # Running aggregates behind the KPIs, so reading them never touches the history
+        self.queue_arrival_sum = 0
+        self.queue_length = TimeWeightedStat()
+        self.busy_berths = TimeWeightedStat()
+        self.queue_wait = QueueWaitStat()
+        self.waits = RunningStat()
+        self.series = new_series()
+        self.calendar = EventCalendar()
+        self.calendar.schedule(0, WEATHER)
+        self.arrivals = ArrivalStream(self.streams['arrivals'], self.params['arrival_rate'] / 60)
+        self.calendar.schedule(next(self.arrivals), ARRIVAL)
+        self.calendar.schedule(60, MAINTENANCE)
+
+    @property
+    def _handlers(self):
+        return {
+            WEATHER: self._on_weather,
+            ARRIVAL: self._on_arrival,
+            PILOTAGE_END: self._on_pilotage_end,
+            LEAVE_END: self._on_leave_end,
+            MOORING_END: self._on_mooring_end,
+            SERVICE_END: self._on_service_end,
+            UNMOORING_END: self._on_unmooring_end,
+            MAINTENANCE: self._on_maintenance,
+        }
+
+    @property
+    def finished(self):
+        return self.minute >= self.horizon
+
+    @property
+    def total_cost(self):
+        return self.container_cost + self.maintenance_cost
+
+    @property
+    def occupied_berths(self):
+        return len(self.berths) - len(self.free_berths) - len(self.moving_ships)
+
+    @property
+    def samples(self):
+        return len(self.series['time_series'])
+
+    def current_wait(self):
+        """Mean time the ships now in the queue have been waiting."""
+        if not self.queue:
+            return 0
+        return self.minute - self.queue_arrival_sum / len(self.queue)
+
+    def kpis(self):
+        """Return the results-panel KPIs; each is read from a running aggregate in O(1)."""
+        now = self.minute
+        num_berths = len(self.berths)
+        total_cost = self.total_cost
+        profit = self.total_income - total_cost
+        return {
+            'minute': now,
+            'queue_length': len(self.queue),
+            'max_queue': self.queue_length.maximum,
+            'avg_queue': self.queue_length.mean(now),
+            'current_wait': self.current_wait(),
+            'avg_wait': self.queue_wait.mean(now, len(self.queue), self.queue_arrival_sum),
+            'avg_ship_wait': self.waits.mean,
+            'max_wait': self.waits.maximum or 0,
+            'ships_served': self.waits.count,
+            'occupied_berths': self.occupied_berths,
+            'utilization': self.occupied_berths / num_berths,
+            'avg_utilization': self.busy_berths.mean(now) / num_berths,
+            'total_income': self.total_income,
+            'container_cost': self.container_cost,
+            'maintenance_cost': self.maintenance_cost,
+            'total_cost': total_cost,
+            'profit': profit,
+            'profit_margin': profit / self.total_income * 100 if self.total_income > 0 else 0,
+        }
+
+    def reset_statistics(self):
+        """Restart the KPI aggregates at the current minute.
+
+        Called at the end of a warm-up period, so the KPIs describe the port in steady state
+        rather than the initial empty-port transient. The queue, wait and utilization averages and
+        the financial totals all restart, so every KPI covers the same window; ``ships_served``
+        counts from here on. The metric series are kept.
+        """
+        now = self.minute
+        self.queue_length = TimeWeightedStat(len(self.queue), now, now, 0.0, len(self.queue))
+        self.busy_berths = TimeWeightedStat(self.occupied_berths, now, now, 0.0, self.occupied_berths)
+        self.queue_wait = QueueWaitStat(now, now)
+        self.waits = RunningStat()
+        self.total_income = 0
+        self.container_cost = 0
+        self.maintenance_cost = 0
+
+    def series_since(self, start=0):
+        """Return the metric series from sample ``start`` onwards."""
+        return {name: values[start:] for name, values in self.series.items()}
+
+    def containers_for(self, class_name):
+        return self.class_containers[CLASS_CODES[class_name]]
+
+    def _new_queue(self, ships=()):
+        priority_of = ship_priority if self.params['use_priority'] else None
+        return ShipQueue(priority_of, ships)
+
+    def random_ship_class(self):
+        """Class code of a new ship, drawn from the class distribution."""
+        r = self.streams['ship_class'].random()
+        for cumulative, code in self._class_thresholds:
+            if r <= cumulative:
+                return code
+        return MEDIUM
+
+    def step(self, minutes=1):
+        """Advance ``minutes`` simulated minutes and record one metrics sample (one UI tick)."""
+        if PROFILER.enabled:
+            self._step_profiled(minutes)
+            return
+        self._advance(self.minute + minutes)
+        self._record_metrics()
+
+    def _step_profiled(self, minutes):
+        events, arrived, served = self.events_processed, self.ship_id_counter, self.waits.count
+        self._advance(self.minute + minutes)
+        PROFILER.timed('record_metrics', self._record_metrics)()
+        PROFILER.observe('harbour_tick_events', self.events_processed - events)
+        PROFILER.count('harbour_ships_arrived_total', self.ship_id_counter - arrived)
+        PROFILER.count('harbour_ships_served_total', self.waits.count - served)
+
+    def run(self, minutes=None, sample_every=1):
+        """Advance ``minutes`` (default: up to the horizon), sampling metrics every ``sample_every`` minutes.
+
+        With ``sample_every=None`` no series are recorded; the KPIs are still exact.
+        """
+        end = self.horizon if minutes is None else self.minute + minutes
+        if sample_every is None:
+            self._advance(end)
+            return self
+        while self.minute < end:
+            self.step(min(sample_every, end - self.minute))
+        return self
+
+    def _advance(self, until):
+        calendar = self.calendar
+        handlers = self._handlers
+        if PROFILER.enabled:
+            handlers = {kind: PROFILER.timed(kind, handler) for kind, handler in handlers.items()}
+        event_sink = self.event_sink
+        while calendar and calendar.peek_time() <= until:
+            time, kind, payload, token = calendar.pop()
+            self.minute = time
+            handlers[kind](payload, token)
+            self.events_processed += 1
+            if event_sink is not None:
+                event_sink.write((time, kind, payload, len(self.queue)))
+        self.minute = until
+
+    def _on_weather(self, payload, token):
+        p = self.params
+        was_bad = self.is_bad_weather
+        self.is_bad_weather = self.streams['weather_occurrence'].random() < p['bad_weather_probability']
+        duration = self.streams['weather_duration'].randint(p['min_weather_duration'], p['max_weather_duration'])
+        self.weather_until = self.minute + max(1, duration)
+        self.calendar.schedule(self.weather_until, WEATHER)
+        if self.is_bad_weather and not was_bad:
+            # Bad weather halts all berth operations: freeze the remaining time of each phase
+            for berth in self.berths:
+                if berth is not None and berth.event is not None:
+                    berth.time_left = berth.ends_at - self.minute
+                    berth.event = None
+        elif was_bad and not self.is_bad_weather:
+            for i, berth in enumerate(self.berths):
+                if berth is not None:
+                    self._schedule_berth(i, berth.time_left)
+            self._dispatch()
+
+    def _on_arrival(self, payload, token):
+        self.queue_wait.update(self.minute, len(self.queue), self.queue_arrival_sum)
+        self.queue.append(Ship(self.ship_id_counter, self.random_ship_class(), self.minute))
+        self.queue_arrival_sum += self.minute
+        self.queue_length.update(self.minute, len(self.queue))
+        self.ship_id_counter += 1
+        self.calendar.schedule(next(self.arrivals), ARRIVAL)
+        self._dispatch()
+
+    def _on_pilotage_end(self, i, token):
+        p = self.params
+        mship = self.moving_ships.pop(i)
+        self.berths[i] = Berth(mship.id, mship.ship_class, MOORING, p['mooring_time'], p['mooring_time'])
+        self.busy_berths.update(self.minute, self.occupied_berths)
+        if not self.is_bad_weather:
+            self._schedule_berth(i, p['mooring_time'])
+
+    def _on_leave_end(self, i, token):
+        # Ships leave in the order they unmoored, so the first one from berth i is the one due
+        for index, lship in enumerate(self.leaving_ships):
+            if lship.berth == i:
+                del self.leaving_ships[index]
+                break
+
+    def _on_mooring_end(self, i, token):
+        berth = self._berth_for_event(i, token)
+        if berth is None:
+            return
+        containers = self.class_containers[berth.ship_class]
+        total_processing_time = (containers / self.params['berth_productivity']) * 60  # hours to minutes
+        berth.phase = SERVICE
+        berth.duration = total_processing_time
+        berth.total_containers = containers
+        self._schedule_berth(i, total_processing_time)
+
+    def _on_service_end(self, i, token):
+        berth = self._berth_for_event(i, token)
+        if berth is None:
+            return
+        p = self.params
+        containers = berth.total_containers
+        self.total_income += containers * p['income_per_container']
+        self.container_cost += containers * p['cost_per_container']
+        berth.phase = UNMOORING
+        berth.duration = p['mooring_time']
+        self._schedule_berth(i, p['mooring_time'])
+
+    def _on_unmooring_end(self, i, token):
+        berth = self._berth_for_event(i, token)
+        if berth is None:
+            return
+        from_x = (self.params['num_berths'] - 1 - i) * 2 + 0.25
+        self.leaving_ships.append(LeavingShip(berth.id, berth.ship_class, i, from_x, from_x + 4.0, 1.25, 1.25 + 2.5,
+                                              self.minute))
+        # Every event payload is a berth index, which is what event records report
+        self.calendar.schedule(self.minute + LEAVING_MINUTES, LEAVE_END, i)
+        self.berths[i] = None
+        heapq.heappush(self.free_berths, i)
+        self.busy_berths.update(self.minute, self.occupied_berths)
+        self._dispatch()
+
+    def _on_maintenance(self, payload, token):
+        maintenance_per_minute = self.params['monthly_maintenance_cost'] / MINUTES_PER_MONTH
+        self.maintenance_cost += maintenance_per_minute * 60
+        self.calendar.schedule(self.minute + 60, MAINTENANCE)
+
+    def _berth_for_event(self, i, token):
+        # Events of a phase frozen by bad weather are stale and must be skipped
+        berth = self.berths[i]
+        if berth is None or berth.event != token:
+            return None
+        return berth
+
+    def _schedule_berth(self, i, delay):
+        berth = self.berths[i]
+        berth.ends_at = self.minute + delay
+        berth.event = self.calendar.schedule(berth.ends_at, PHASE_END_EVENTS[berth.phase], i)
+
+    def _dispatch(self):
+        # Move ships from queue to free berths with pilotage
+        if self.is_bad_weather:
+            return
+        p = self.params
+        num_berths = p['num_berths']
+        if not (self.queue and self.free_berths):
+            return
+        self.queue_wait.update(self.minute, len(self.queue), self.queue_arrival_sum)
+        while self.queue and self.free_berths:
+            i = heapq.heappop(self.free_berths)
+            ship = self.queue.pop()
+            self.queue_arrival_sum -= ship.arrival_time
+            self.waits.add(self.minute - ship.arrival_time)
+            self.moving_ships[i] = MovingShip(ship.id, ship.ship_class, i, -1.5, (num_berths - 1 - i) * 2 + 0.25,
+                                              self.minute)
+            self.calendar.schedule(self.minute + p['pilotage_time'], PILOTAGE_END, i)
+        if not self.queue:
+            self.queue_arrival_sum = 0  # drop accumulated float error
+        self.queue_length.update(self.minute, len(self.queue))
+
+    def _record_metrics(self):
+        total_cost = self.total_cost
+        row = (self.minute, len(self.queue), self.current_wait(), self.occupied_berths / len(self.berths),
+               self.total_income, total_cost, self.total_income - total_cost)
+        if self.keep_history:
+            series = self.series
+            for name, value in zip(HISTORY_COLUMNS, row):
+                series[name].append(value)
+        if self.sink is not None:
+            self.sink.write(row)
+
+    def snapshot(self, include_series=True):
+        """Return the full state as a JSON-serializable dict.
+
+        Ships and berths become string-keyed records (see ``harbour.entities``) carrying the
+        derived ``progress`` and ``time_left`` fields the UI draws, and ``kpis`` holds the current
+        KPIs. The metric series can be left out when only the current state is needed.
+        """
+        now = self.minute
+        pilotage_time = self.params['pilotage_time']
+        moving_ships = []
+        for ship in self.moving_ships.values():
+            record = ship.to_dict()
+            record['progress'] = min(1.0, (now - ship.start) / pilotage_time)
+            moving_ships.append(record)
+        leaving_ships = []
+        for ship in self.leaving_ships:
+            record = ship.to_dict()
+            record['progress'] = (now - ship.start) * LEAVING_SPEED
+            leaving_ships.append(record)
+        state = {
+            'minute': now,
+            'horizon': self.horizon,
+            'params': make_params(self.params),
+            'queue': [ship.to_dict() for ship in self.queue],
+            'berths': [berth.to_dict(now) if berth is not None else None for berth in self.berths],
+            'moving_ships': moving_ships,
+            'leaving_ships': leaving_ships,
+            'ship_id_counter': self.ship_id_counter,
+            'is_bad_weather': self.is_bad_weather,
+            'weather_until': self.weather_until,
+            'total_income': self.total_income,
+            'total_cost': self.total_cost,
+            'container_cost': self.container_cost,
+            'maintenance_cost': self.maintenance_cost,
+            'monthly_maintenance_cost': self.params['monthly_maintenance_cost'],
+            'events_processed': self.events_processed,
+            'calendar': self.calendar.to_list(),
+            'seed': self.seed,
+            'rng_state': {name: stream.getstate() for name, stream in self.streams.items()},
+            'arrivals': {'last': self.arrivals.last, 'pending': self.arrivals.pending()},
+            'queue_arrival_sum': self.queue_arrival_sum,
+            'stats': {
+                'queue_length': self.queue_length.to_dict(),
+                'busy_berths': self.busy_berths.to_dict(),
+                'queue_wait': self.queue_wait.to_dict(),
+                'waits': self.waits.to_dict(),
+            },
+            'kpis': self.kpis(),
+        }
+        if include_series:
+            for name, values in self.series.items():
+                state[name] = list(values)
+        return state
+
+    def fork(self, params=None, horizon=None, **overrides):
+        """Return an independent copy of the simulation at its current minute, as a what-if branch.
+
+        ``params``/``overrides`` change parameters from here on; ships already at a berth keep
+        their cargo. The branch continues the random streams of the original, so until their
+        decisions differ both see the same arrivals and weather (common random numbers). Berths
+        can be added, and removed only while empty. A new arrival rate takes effect at once: the
+        next arrival is redrawn, which is exact for a Poisson process.
+        """
+        state = self.snapshot(include_series=False)
+        state['series'] = self.series
+        state['params'] = make_params(dict(self.params, **(params or {})), **overrides)
+        if horizon is not None:
+            state['horizon'] = horizon
+        num_berths = state['params']['num_berths']
+        berths = state['berths']
+        if num_berths < len(berths):
+            reserved = {ship['target_berth'] for ship in state['moving_ships']}
+            if any(berth is not None or i in reserved for i, berth in enumerate(berths[num_berths:], num_berths)):
+                raise ValueError('only empty berths can be removed from a running simulation')
+        state['berths'] = berths[:num_berths] + [None] * (num_berths - len(berths))
+        rate_changed = state['params']['arrival_rate'] != self.params['arrival_rate']
+        if rate_changed:
+            state['calendar'] = [entry for entry in state['calendar'] if entry[3] != ARRIVAL]
+            state['arrivals'] = {'last': self.minute, 'pending': []}
+        sim = type(self).from_snapshot(state)
+        if rate_changed:
+            sim.calendar.schedule(next(sim.arrivals), ARRIVAL)
+        return sim
+
+    @classmethod
+    def from_snapshot(cls, state):
+        sim = cls(state['params'], seed=state['seed'], horizon=state.get('horizon', SIMULATION_MINUTES))
+        sim.minute = state['minute']
+        sim.queue = sim._new_queue(Ship.from_dict(ship) for ship in state['queue'])
+        sim.berths = [Berth.from_dict(berth) if berth is not None else None for berth in state['berths']]
+        sim.moving_ships = {ship['target_berth']: MovingShip.from_dict(ship) for ship in state['moving_ships']}
+        sim.free_berths = [i for i, berth in enumerate(sim.berths) if berth is None and i not in sim.moving_ships]
+        sim.leaving_ships = [LeavingShip.from_dict(ship) for ship in state['leaving_ships']]
+        sim.ship_id_counter = state['ship_id_counter']
+        sim.is_bad_weather = state['is_bad_weather']
+        sim.weather_until = state['weather_until']
+        sim.total_income = state['total_income']
+        sim.container_cost = state['container_cost']
+        sim.maintenance_cost = state['maintenance_cost']
+        sim.events_processed = state['events_processed']
+        sim.calendar = EventCalendar(state['calendar'])
+        for name, (version, internal_state, gauss_next) in state['rng_state'].items():
+            sim.streams[name].setstate((version, tuple(internal_state), gauss_next))
+        sim.arrivals = ArrivalStream(sim.streams['arrivals'], sim.params['arrival_rate'] / 60,
+                                     start=state['arrivals']['last'], buffered=state['arrivals']['pending'])
+        sim.queue_arrival_sum = state['queue_arrival_sum']
+        sim.queue_length = TimeWeightedStat.from_dict(state['stats']['queue_length'])
+        sim.busy_berths = TimeWeightedStat.from_dict(state['stats']['busy_berths'])
+        sim.queue_wait = QueueWaitStat.from_dict(state['stats']['queue_wait'])
+        sim.waits = RunningStat.from_dict(state['stats']['waits'])
+        sim.series = new_series(state.get('series', state))
+        return sim
@@ -0,0 +1,116 @@
+# Compact ship and berth records. Ship classes and berth phases are small integer codes that index
+# the per-class and per-phase tuples the engine precomputes; ``to_dict``/``from_dict`` convert to
+# and from the string-keyed records of a snapshot, which the web view draws from.
+
+# Ship class codes, in the order of ``CLASS_NAMES``
+SMALL, MEDIUM, LARGE = range(3)
+CLASS_NAMES = ('SMALL', 'MEDIUM', 'LARGE')
+CLASS_CODES = {name: code for code, name in enumerate(CLASS_NAMES)}
+
+# Berth phase codes, in the order of ``PHASE_NAMES``
+MOORING, SERVICE, UNMOORING = range(3)
+PHASE_NAMES = ('mooring', 'service', 'unmooring')
+PHASE_CODES = {name: code for code, name in enumerate(PHASE_NAMES)}
+
+
+class Ship:
+    """A ship waiting in the queue."""
+
+    __slots__ = ('id', 'ship_class', 'arrival_time')
+
+    def __init__(self, id, ship_class, arrival_time):
+        self.id = id
+        self.ship_class = ship_class
+        self.arrival_time = arrival_time
+
+    def to_dict(self):
+        return {'id': self.id, 'class': CLASS_NAMES[self.ship_class], 'arrival_time': self.arrival_time}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], CLASS_CODES[data['class']], data['arrival_time'])
+
+
+class MovingShip:
+    """A ship under pilotage from the queue to the berth reserved for it."""
+
+    __slots__ = ('id', 'ship_class', 'target_berth', 'from_x', 'to_x', 'start')
+
+    def __init__(self, id, ship_class, target_berth, from_x, to_x, start):
+        self.id = id
+        self.ship_class = ship_class
+        self.target_berth = target_berth
+        self.from_x = from_x
+        self.to_x = to_x
+        self.start = start
+
+    def to_dict(self):
+        return {'id': self.id, 'from_x': self.from_x, 'to_x': self.to_x, 'target_berth': self.target_berth,
+                'class': CLASS_NAMES[self.ship_class], 'state': 'pilotage', 'start': self.start}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], CLASS_CODES[data['class']], data['target_berth'], data['from_x'], data['to_x'],
+                   data['start'])
+
+
+class LeavingShip:
+    """A ship sailing off ``berth`` after unmooring; only drawn, it no longer affects the port."""
+
+    __slots__ = ('id', 'ship_class', 'berth', 'from_x', 'to_x', 'from_y', 'to_y', 'start')
+
+    def __init__(self, id, ship_class, berth, from_x, to_x, from_y, to_y, start):
+        self.id = id
+        self.ship_class = ship_class
+        self.berth = berth
+        self.from_x = from_x
+        self.to_x = to_x
+        self.from_y = from_y
+        self.to_y = to_y
+        self.start = start
+
+    def to_dict(self):
+        return {'id': self.id, 'berth': self.berth, 'from_x': self.from_x, 'to_x': self.to_x, 'from_y': self.from_y,
+                'to_y': self.to_y, 'start': self.start, 'class': CLASS_NAMES[self.ship_class]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], CLASS_CODES[data['class']], data['berth'], data['from_x'], data['to_x'],
+                   data.get('from_y', 1.25), data.get('to_y', 1.25), data['start'])
+
+
+class Berth:
+    """The ship occupying a berth and the phase (mooring, service, unmooring) it is in.
+
+    ``event`` is the calendar token of the end of the phase, None while bad weather freezes it;
+    ``time_left`` then holds the remaining duration.
+    """
+
+    __slots__ = ('id', 'ship_class', 'phase', 'time_left', 'duration', 'total_containers', 'ends_at', 'event')
+
+    def __init__(self, id, ship_class, phase, time_left, duration, total_containers=None, ends_at=None,
+                 event=None):
+        self.id = id
+        self.ship_class = ship_class
+        self.phase = phase
+        self.time_left = time_left
+        self.duration = duration
+        self.total_containers = total_containers
+        self.ends_at = ends_at
+        self.event = event
+
+    def to_dict(self, now=None):
+        """Snapshot record; with ``now``, ``time_left`` of a running phase is brought up to date."""
+        time_left = self.time_left
+        if now is not None and self.event is not None:
+            time_left = self.ends_at - now
+        data = {'id': self.id, 'state': PHASE_NAMES[self.phase], 'time_left': time_left, 'duration': self.duration,
+                'class': CLASS_NAMES[self.ship_class], 'event': self.event, 'ends_at': self.ends_at}
+        if self.total_containers is not None:
+            data['total_containers'] = self.total_containers
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], CLASS_CODES[data['class']], PHASE_CODES[data['state']], data['time_left'],
+                   data['duration'], data.get('total_containers'), data.get('ends_at'), data.get('event'))
@@ -0,0 +1,55 @@
+import heapq
+
+WEATHER = 'weather'
+ARRIVAL = 'arrival'
+PILOTAGE_END = 'pilotage_end'
+LEAVE_END = 'leave_end'
+MOORING_END = 'mooring_end'
+SERVICE_END = 'service_end'
+UNMOORING_END = 'unmooring_end'
+MAINTENANCE = 'maintenance'
+
+# Events due at the same minute fire in the order the minute-by-minute model used to process them
+KIND_ORDER = {
+    WEATHER: 0,
+    ARRIVAL: 1,
+    PILOTAGE_END: 2,
+    LEAVE_END: 3,
+    MOORING_END: 4,
+    SERVICE_END: 4,
+    UNMOORING_END: 4,
+    MAINTENANCE: 5,
+}
+
+
+class EventCalendar:
+    """Heap-ordered future event list.
+
+    Entries are ``(time, kind order, sequence, kind, payload)`` tuples, so events due at the same
+    time are ordered by kind and then by scheduling order. ``schedule`` returns the sequence number,
+    which callers keep as a token to recognise (and skip) events they have since cancelled.
+    """
+
+    def __init__(self, entries=None):
+        self._heap = [tuple(entry) for entry in entries or []]
+        heapq.heapify(self._heap)
+        self._seq = max((entry[2] for entry in self._heap), default=-1) + 1
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, time, kind, payload=None):
+        token = self._seq
+        heapq.heappush(self._heap, (time, KIND_ORDER[kind], token, kind, payload))
+        self._seq += 1
+        return token
+
+    def peek_time(self):
+        return self._heap[0][0]
+
+    def pop(self):
+        time, _, token, kind, payload = heapq.heappop(self._heap)
+        return time, kind, payload, token
+
+    def to_list(self):
+        return [list(entry) for entry in self._heap]
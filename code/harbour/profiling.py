@@ -0,0 +1,125 @@
+import functools
+import json
+import os
+import threading
+import time
+
+ENV_VAR = 'HARBOUR_PROFILE'
+
+# Help text of every metric the profiler exports, by name
+HELP = {
+    'harbour_phase_seconds': 'Wall-clock time spent in each simulation or rendering phase.',
+    'harbour_payload_bytes': 'Serialized size of callback outputs sent to the browser.',
+    'harbour_tick_events': 'Simulation events processed per UI tick.',
+    'harbour_ships_arrived_total': 'Ships that arrived at the port.',
+    'harbour_ships_served_total': 'Ships dispatched from the queue to a berth.',
+}
+
+
+def profiling_enabled(environ=os.environ):
+    return environ.get(ENV_VAR, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+class Profiler:
+    """Process-wide hot-path counters and phase timers, exported in Prometheus text format.
+
+    Instrumented code checks ``enabled`` once per call (or, for ``profiled``, once at import), so
+    with profiling off the only cost is an attribute read. Summaries keep a count and a sum per
+    label set; counters keep a running total.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._counters = {}
+
+    def reset(self):
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._summaries.get(key)
+            if entry is None:
+                self._summaries[key] = [1, value]
+            else:
+                entry[0] += 1
+                entry[1] += value
+
+    def timed(self, phase, func):
+        """Wrap ``func`` so every call adds its duration to ``harbour_phase_seconds{phase=...}``."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe('harbour_phase_seconds', time.perf_counter() - start, phase=phase)
+        return wrapper
+
+    def profiled(self, phase, encoder=None):
+        """Decorator timing a function as ``phase``; a no-op when profiling is off.
+
+        With a JSON ``encoder`` the serialized size of the return value is also recorded as
+        ``harbour_payload_bytes{callback=phase}``.
+        """
+        def decorate(func):
+            if not self.enabled:
+                return func
+            timed = self.timed(phase, func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                result = timed(*args, **kwargs)
+                if encoder is not None:
+                    size = len(json.dumps(result, cls=encoder))
+                    self.observe('harbour_payload_bytes', size, callback=phase)
+                return result
+            return wrapper
+        return decorate
+
+    def prometheus_text(self, gauges=None):
+        """Render all metrics, plus ``gauges`` ({name: value}), in the Prometheus text format."""
+        with self._lock:
+            summaries = {key: list(entry) for key, entry in self._summaries.items()}
+            counters = dict(self._counters)
+
+        lines = ['# HELP harbour_profiling_enabled Whether hot-path profiling is on (HARBOUR_PROFILE).',
+                 '# TYPE harbour_profiling_enabled gauge',
+                 f'harbour_profiling_enabled {int(self.enabled)}']
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f'# TYPE {name} gauge', f'{name} {value}']
+        for name in sorted({name for name, _ in summaries}):
+            lines += _header(name, 'summary')
+            for (metric, labels), (count, total) in sorted(summaries.items()):
+                if metric == name:
+                    lines.append(f'{name}_count{_labels(labels)} {count}')
+                    lines.append(f'{name}_sum{_labels(labels)} {total!r}')
+        for name in sorted({name for name, _ in counters}):
+            lines += _header(name, 'counter')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _header(name, kind):
+    lines = [f'# HELP {name} {HELP[name]}'] if name in HELP else []
+    return lines + [f'# TYPE {name} {kind}']
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+PROFILER = Profiler(profiling_enabled())
@@ -0,0 +1,45 @@
+from collections import deque
+
+
+class ShipQueue:
+    """Waiting ships, served highest priority first and first-come-first-served within a priority.
+
+    Keeps one deque per priority level, so enqueue and dequeue are O(1) and ships of the same
+    priority always leave in arrival order. Without ``priority_of`` every ship shares one level,
+    which is plain FIFO.
+    """
+
+    def __init__(self, priority_of=None, ships=()):
+        self.priority_of = priority_of
+        self._lanes = {}
+        self._priorities = []  # highest first
+        self._len = 0
+        for ship in ships:
+            self.append(ship)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        # Service order
+        for priority in self._priorities:
+            yield from self._lanes[priority]
+
+    def append(self, ship):
+        priority = self.priority_of(ship) if self.priority_of else 0
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+            self._priorities.append(priority)
+            self._priorities.sort(reverse=True)
+        lane.append(ship)
+        self._len += 1
+
+    def pop(self):
+        """Remove and return the next ship to serve."""
+        for priority in self._priorities:
+            lane = self._lanes[priority]
+            if lane:
+                self._len -= 1
+                return lane.popleft()
+        raise IndexError('pop from an empty ShipQueue')
@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from harbour.engine import SIMULATION_MINUTES, PortSimulation, make_params
+from harbour.stats import confidence_interval, is_precise, mser
+from harbour.streams import derive_seed, new_seed
+
+# KPIs of the "Simulation Results" panel that replication summaries report on
+KPI_NAMES = ('avg_wait', 'max_queue', 'avg_utilization', 'total_income', 'profit')
+# Every KPI of the results panel
+PANEL_KPI_NAMES = ('max_queue', 'avg_queue', 'avg_wait', 'avg_ship_wait', 'max_wait', 'ships_served',
+                   'avg_utilization', 'total_income', 'container_cost', 'maintenance_cost', 'total_cost', 'profit', 'profit_margin')
+# KPIs whose confidence intervals decide when sequential replications stop
+PRECISION_KPI_NAMES = ('avg_wait', 'avg_utilization')
+
+
+def replication_seeds(seed, replications):
+    """Derive one independent seed per replication from a master seed.
+
+    Replication ``i`` gets the same seed in every scenario, so scenarios compared with the same
+    master seed share their arrival and weather sample paths (common random numbers).
+    """
+    return [derive_seed(seed, 'replication', i) for i in range(replications)]
+
+
+def run_replication(params, minutes, seed, warmup=0):
+    """Run one replication without recording series and return its KPIs.
+
+    The first ``warmup`` minutes are simulated before, and left out of, the ``minutes`` measured.
+    """
+    sim = PortSimulation(params, seed=seed)
+    if warmup:
+        sim.run(warmup, sample_every=None)
+        sim.reset_statistics()
+    return sim.run(minutes, sample_every=None).kpis()
+
+
+def pilot_series(params, minutes, seed, warmup=0):
+    """Queue length and berth utilization sampled every minute of one replication, after ``warmup``."""
+    sim = PortSimulation(params, seed=seed)
+    sim.run(warmup, sample_every=None)
+    sim.run(minutes)
+    return list(sim.series['queue_series']), list(sim.series['berth_utilization'])
+
+
+def summarize(results, level=0.95, kpi_names=KPI_NAMES):
+    """Mean and confidence interval of each KPI over a list of per-replication KPI dicts."""
+    return {name: confidence_interval([kpis[name] for kpis in results], level) for name in kpi_names}
+
+
+def replicate(params, minutes, seeds, workers=None, warmup=0, task=run_replication):
+    """``task`` (KPIs of one replication by default) per seed, run in a process pool (in-process for ``workers=1``)."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [task(params, minutes, s, warmup) for s in seeds]
+    chunksize = max(1, len(seeds) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(task, [params] * len(seeds), [minutes] * len(seeds), seeds, [warmup] * len(seeds),
+                                 chunksize=chunksize))
+
+
+def estimate_warmup(params=None, minutes=SIMULATION_MINUTES, pilots=5, workers=None, seed=None, batch_size=5):
+    """Length in minutes of the initial transient of a scenario, by the MSER-5 rule on pilot runs.
+
+    The queue length and berth utilization of ``pilots`` replications are averaged minute by
+    minute (Welch's ensemble average, which smooths out the noise MSER would otherwise chase)
+    and truncated with ``mser``; the later of the two truncation points is returned. Pilot seeds
+    are derived apart from the replication seeds of ``seed``.
+    """
+    params = make_params(params)
+    seed = new_seed() if seed is None else seed
+    seeds = [derive_seed(seed, 'pilot', i) for i in range(pilots)]
+    runs = replicate(params, minutes, seeds, workers, task=pilot_series)
+    warmup = 0
+    for outputs in zip(*runs):
+        averaged = [sum(values) / len(values) for values in zip(*outputs)]
+        warmup = max(warmup, mser(averaged, batch_size))
+    return warmup
+
+
+def resolve_warmup(warmup, params, minutes, workers, seed):
+    """``warmup`` in minutes, estimated from pilot runs when it is ``'auto'``."""
+    if warmup == 'auto':
+        return estimate_warmup(params, minutes, workers=workers, seed=seed)
+    return warmup or 0
+
+
+def run_replications(params=None, replications=30, minutes=SIMULATION_MINUTES, workers=None, seed=None,
+                     level=0.95, kpi_names=KPI_NAMES, warmup=0):
+    """Run independent replications of one scenario in a process pool and summarize their KPIs.
+
+    Every replication gets its own seed derived from ``seed`` (a fresh one, reported in the result,
+    when not given), so a run is reproducible regardless of the number of workers. Each
+    replication first simulates ``warmup`` minutes (``'auto'``: see ``estimate_warmup``) that the
+    KPIs leave out.
+    """
+    params = make_params(params)
+    seed = new_seed() if seed is None else seed
+    warmup = resolve_warmup(warmup, params, minutes, workers, seed)
+    results = replicate(params, minutes, replication_seeds(seed, replications), workers, warmup)
+    return {
+        'params': params,
+        'replications': replications,
+        'minutes': minutes,
+        'warmup': warmup,
+        'seed': seed,
+        'level': level,
+        'kpis': summarize(results, level, kpi_names),
+    }
+
+
+def run_until_precise(params=None, tolerance=0.05, minutes=SIMULATION_MINUTES, workers=None, seed=None, level=0.95,
+                      kpi_names=KPI_NAMES, warmup=0, batch=10, max_replications=1000,
+                      precision_kpis=PRECISION_KPI_NAMES):
+    """Add replications in batches of ``batch`` until the KPIs are known precisely enough.
+
+    Stops once the confidence interval half-width of every KPI in ``precision_kpis`` is within
+    ``tolerance`` (relative, e.g. 0.05 for 5%) of its mean, or after ``max_replications``. The
+    replication seeds are those of ``run_replications``, so a run stopped after ``n``
+    replications matches ``run_replications`` with ``replications=n``.
+    """
+    params = make_params(params)
+    seed = new_seed() if seed is None else seed
+    warmup = resolve_warmup(warmup, params, minutes, workers, seed)
+    names = tuple(kpi_names) + tuple(name for name in precision_kpis if name not in kpi_names)
+    results = []
+    converged = False
+    while not converged and len(results) < max_replications:
+        count = min(len(results) + batch, max_replications)
+        seeds = replication_seeds(seed, count)[len(results):]
+        results += replicate(params, minutes, seeds, workers, warmup)
+        kpis = summarize(results, level, names)
+        converged = all(is_precise(kpis[name], tolerance) for name in precision_kpis)
+    return {
+        'params': params,
+        'replications': len(results),
+        'minutes': minutes,
+        'warmup': warmup,
+        'seed': seed,
+        'level': level,
+        'tolerance': tolerance,
+        'converged': converged,
+        'kpis': {name: kpis[name] for name in kpi_names},
+    }
+
+
+def compare_scenarios(base_params, alternative_params, replications=30, minutes=SIMULATION_MINUTES, workers=None,
+                      seed=None, level=0.95):
+    """Compare two scenarios under common random numbers.
+
+    Both scenarios run with the same replication seeds, so replication ``i`` of each sees the same
+    arrivals and weather. The confidence interval of the paired per-replication differences
+    (alternative minus base) is then much narrower than that of two independent estimates.
+    """
+    base_params = make_params(base_params)
+    alternative_params = make_params(alternative_params)
+    seed = new_seed() if seed is None else seed
+    seeds = replication_seeds(seed, replications)
+    base = replicate(base_params, minutes, seeds, workers)
+    alternative = replicate(alternative_params, minutes, seeds, workers)
+    differences = [{name: alt[name] - ref[name] for name in KPI_NAMES} for ref, alt in zip(base, alternative)]
+    return {
+        'base_params': base_params,
+        'alternative_params': alternative_params,
+        'replications': replications,
+        'minutes': minutes,
+        'seed': seed,
+        'level': level,
+        'base': summarize(base, level),
+        'alternative': summarize(alternative, level),
+        'difference': summarize(differences, level),
+    }
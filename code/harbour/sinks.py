@@ -0,0 +1,95 @@
+import abc
+import csv
+import os
+
+# Arrow type of each field type used by the record schemas (engine.SAMPLE_FIELDS, EVENT_FIELDS)
+ARROW_TYPES = {'float': 'float64', 'int': 'int64', 'str': 'string'}
+
+
+class RecordSink(abc.ABC):
+    """Append-only record file written in chunks of ``chunk_rows`` rows.
+
+    ``fields`` is a sequence of ``(name, type)`` pairs and rows are tuples in that order. At most
+    one chunk is held in memory, so a run of any length is written in bounded memory.
+    """
+
+    def __init__(self, path, fields, chunk_rows):
+        self.path = path
+        self.fields = tuple(fields)
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._rows = []
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self._write_chunk(self._rows)
+            self.rows_written += len(self._rows)
+            self._rows = []
+
+    @abc.abstractmethod
+    def _write_chunk(self, rows):
+        """Append ``rows`` to the file."""
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvSink(RecordSink):
+    def __init__(self, path, fields, chunk_rows=4096):
+        super().__init__(path, fields, chunk_rows)
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in self.fields])
+
+    def _write_chunk(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ParquetSink(RecordSink):
+    """Parquet file with one row group per chunk (requires pyarrow)."""
+
+    def __init__(self, path, fields, chunk_rows=65536):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ImportError('Writing Parquet needs pyarrow: pip install pyarrow') from exc
+        super().__init__(path, fields, chunk_rows)
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([(name, ARROW_TYPES[kind]) for name, kind in self.fields])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def _write_chunk(self, rows):
+        columns = [self._pa.array(values, type=field.type) for values, field in zip(zip(*rows), self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+
+def open_sink(path, fields, chunk_rows=None):
+    """Open a CSV or Parquet sink, chosen by the extension of ``path``."""
+    kwargs = {} if chunk_rows is None else {'chunk_rows': chunk_rows}
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        return ParquetSink(path, fields, **kwargs)
+    return CsvSink(path, fields, **kwargs)
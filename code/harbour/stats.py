@@ -0,0 +1,180 @@
+import math
+from statistics import NormalDist, mean, stdev
+
+
+def t_quantile(probability, df):
+    """Quantile of Student's t distribution.
+
+    Exact for one and two degrees of freedom, a Cornish-Fisher expansion around the normal
+    quantile otherwise (within 1% from three degrees of freedom on).
+    """
+    if df == 1:
+        return math.tan(math.pi * (probability - 0.5))
+    if df == 2:
+        return (2 * probability - 1) / math.sqrt(2 * probability * (1 - probability))
+    z = NormalDist().inv_cdf(probability)
+    return (z
+            + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+def confidence_interval(values, level=0.95):
+    """Return mean, standard deviation and Student-t confidence interval of independent samples."""
+    values = list(values)
+    n = len(values)
+    if n == 0:
+        raise ValueError('confidence_interval() needs at least one value')
+    center = mean(values)
+    if n == 1:
+        return {'mean': center, 'std': 0.0, 'half_width': math.inf, 'low': -math.inf, 'high': math.inf}
+    std = stdev(values)
+    half_width = t_quantile((1 + level) / 2, n - 1) * std / math.sqrt(n)
+    return {'mean': center, 'std': std, 'half_width': half_width,
+            'low': center - half_width, 'high': center + half_width}
+
+
+def mser(values, batch_size=5):
+    """Warm-up truncation point of an output series by the MSER-``batch_size`` rule (MSER-5 by default).
+
+    The series is cut into batch means; the truncation minimizing the marginal standard error of
+    the remaining batches, searched over the first half of the series, is returned as the number
+    of leading observations to drop (a multiple of ``batch_size``).
+    """
+    values = list(values)
+    batches = [sum(values[i:i + batch_size]) / batch_size
+               for i in range(0, len(values) - batch_size + 1, batch_size)]
+    k = len(batches)
+    if k < 2:
+        return 0
+    # Sums of the batch means and of their squares over batches d..k-1, for every d
+    total = square_total = 0.0
+    suffix = [None] * k
+    for d in range(k - 1, -1, -1):
+        total += batches[d]
+        square_total += batches[d] * batches[d]
+        suffix[d] = (total, square_total)
+    best, best_d = math.inf, 0
+    for d in range(k // 2 + 1):
+        total, square_total = suffix[d]
+        n = k - d
+        statistic = (square_total - total * total / n) / (n * n)
+        if statistic < best:
+            best, best_d = statistic, d
+    return best_d * batch_size
+
+
+def batch_means_interval(values, batches=20, level=0.95):
+    """Confidence interval of the mean of one autocorrelated output series, by non-overlapping batch means."""
+    values = list(values)
+    size = len(values) // batches
+    if size < 1:
+        return confidence_interval(values, level)
+    return confidence_interval([sum(values[i:i + size]) / size for i in range(0, size * batches, size)], level)
+
+
+def is_precise(interval, tolerance):
+    """Whether a confidence interval's half-width is within ``tolerance`` times the magnitude of its mean."""
+    return interval['half_width'] <= tolerance * abs(interval['mean'])
+
+
+class RunningStat:
+    """Count, sum and extremes of a stream of observations, updated in O(1)."""
+
+    def __init__(self, count=0, total=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class TimeWeightedStat:
+    """Time-weighted average and maximum of a piecewise-constant quantity such as a queue length.
+
+    ``update`` must be called whenever the quantity changes; the area under it is accumulated
+    lazily, so reading the mean at any moment is O(1).
+    """
+
+    def __init__(self, value=0, start=0, last_time=0, area=0.0, maximum=0):
+        self.value = value
+        self.start = start
+        self.last_time = last_time
+        self.area = area
+        self.maximum = maximum
+
+    def update(self, time, value):
+        self.area += self.value * (time - self.last_time)
+        self.last_time = time
+        self.value = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def mean(self, now):
+        elapsed = now - self.start
+        if elapsed <= 0:
+            return self.value
+        return (self.area + self.value * (now - self.last_time)) / elapsed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class QueueWaitStat:
+    """Time-weighted average of the mean wait of the ships in a queue.
+
+    While the queue holds ``count`` ships whose arrival times sum to ``arrival_sum``, their mean
+    wait at time t is ``t - arrival_sum / count``: linear in t, so every stretch between two queue
+    changes adds an exact trapezoid. ``update`` must be called with the queue as it was just
+    before each change.
+    """
+
+    def __init__(self, start=0, last_time=0, area=0.0):
+        self.start = start
+        self.last_time = last_time
+        self.area = area
+
+    def update(self, time, count, arrival_sum):
+        self.area += self._area_since(time, count, arrival_sum)
+        self.last_time = time
+
+    def mean(self, now, count, arrival_sum):
+        elapsed = now - self.start
+        if elapsed <= 0:
+            return now - arrival_sum / count if count else 0
+        return (self.area + self._area_since(now, count, arrival_sum)) / elapsed
+
+    def _area_since(self, time, count, arrival_sum):
+        if not count:
+            return 0.0
+        return (time - self.last_time) * ((time + self.last_time) / 2 - arrival_sum / count)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
@@ -0,0 +1,87 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class SessionStore:
+    """In-process LRU store with TTL eviction for per-session server-side state.
+
+    Lets the web app keep each browser session's simulation on the server and round-trip only
+    the session key through ``dcc.Store``. Entries not touched for ``ttl`` seconds are dropped,
+    and the least recently used entry goes first once ``max_sessions`` is exceeded. ``on_evict``,
+    if given, is called with each dropped value (outside the store's lock), e.g. to stop the
+    session's background work; values removed with ``pop`` are the caller's to clean up.
+    """
+
+    def __init__(self, max_sessions=100, ttl=3600, clock=time.monotonic, on_evict=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_key():
+        return uuid.uuid4().hex
+
+    def __len__(self):
+        with self._lock:
+            evicted = self._expire()
+            size = len(self._entries)
+        self._evicted(evicted)
+        return size
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        with self._lock:
+            evicted = self._expire()
+            value = default
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                value, _ = self._entries[key]
+                self._entries[key] = (value, self._clock())
+        self._evicted(evicted)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            evicted = self._expire()
+            while len(self._entries) > self.max_sessions:
+                evicted.append(self._entries.popitem(last=False)[1][0])
+        self._evicted(evicted)
+
+    def keys(self):
+        """Keys of the live entries, without touching them."""
+        with self._lock:
+            evicted = self._expire()
+            keys = list(self._entries)
+        self._evicted(evicted)
+        return keys
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def _expire(self):
+        # Entries are kept in access order, so expired ones are always at the front
+        deadline = self._clock() - self.ttl
+        evicted = []
+        while self._entries:
+            key, (value, touched) = next(iter(self._entries.items()))
+            if touched > deadline:
+                break
+            del self._entries[key]
+            evicted.append(value)
+        return evicted
+
+    def _evicted(self, values):
+        if self.on_evict is not None:
+            for value in values:
+                self.on_evict(value)
@@ -0,0 +1,197 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from harbour.analytic import estimate
+from harbour.engine import SIMULATION_MINUTES, apply_overrides
+from harbour.replications import KPI_NAMES, replication_seeds, run_replication, summarize
+from harbour.streams import new_seed
+
+
+def expand_grid(ranges):
+    """Return one ``{name: value}`` dict per point of the cartesian product of ``ranges``.
+
+    ``ranges`` maps parameter names (dotted for nested ones, e.g. ``class_distribution.LARGE``)
+    to the values to try.
+    """
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(ranges[name]) for name in names))]
+
+
+def point_key(params, replications, minutes, seed):
+    """Stable cache key of one sweep point."""
+    payload = json.dumps([params, replications, minutes, seed], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def load_point(cache_dir, key):
+    path = os.path.join(cache_dir, key + '.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_point(cache_dir, key, result):
+    # Write-then-rename, so an interrupted sweep never leaves a truncated result behind
+    path = os.path.join(cache_dir, key + '.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def cache_seed(cache_dir, seed=None):
+    """Master seed of the sweep cached in ``cache_dir``.
+
+    The first sweep run against a cache directory records its master seed there; later runs without
+    an explicit ``seed`` take it back, so their points hash to the cached keys.
+    """
+    saved = load_point(cache_dir, 'seed')
+    if seed is None:
+        seed = saved['seed'] if saved is not None else new_seed()
+    if saved is None:
+        save_point(cache_dir, 'seed', {'seed': seed})
+    return seed
+
+
+def tidy_row(point, kpis, analytic=None):
+    row = dict(point)
+    if analytic is not None:
+        row['analytic_utilization'] = analytic['utilization']
+        row['analytic_wait'] = analytic['avg_wait'] if analytic['stable'] else None
+        row['pruned'] = analytic.get('pruned', False)
+    for name, interval in kpis.items():
+        for stat in ('mean', 'low', 'high'):
+            row[f'{name}_{stat}'] = interval[stat]
+    return row
+
+
+def run_sweep(ranges, base_params=None, replications=10, minutes=SIMULATION_MINUTES, workers=None, seed=None,
+              level=0.95, cache_dir=None, prune=None):
+    """Run ``replications`` of every point of the parameter grid in parallel.
+
+    All points reuse the same replication seeds (common random numbers; a fresh master seed when
+    ``seed`` is None). With ``cache_dir`` the KPIs of every replication of a point are saved as
+    soon as its last replication completes, and points already in the cache are not recomputed,
+    so an interrupted sweep resumes where it stopped; the intervals are summarized at ``level``
+    when the point is read back. Without ``seed`` the master seed recorded in the cache by its
+    first run is reused (see ``cache_seed``).
+
+    Every point is first run through the queueing estimate of ``harbour.analytic``. With ``prune``,
+    a ``(low, high)`` pair of utilizations, points whose estimated utilization is below ``low``
+    (over-provisioned) or at least ``high`` (unstable) are not simulated at all.
+
+    Returns a tidy table: one dict per point with the swept values, the estimated utilization and
+    wait, whether it was pruned, and mean, low and high of each KPI (None for pruned points).
+    """
+    points = expand_grid(ranges)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        seed = cache_seed(cache_dir, seed)
+    seed = new_seed() if seed is None else seed
+    seeds = replication_seeds(seed, replications)
+
+    summaries = {}
+    pending = {}
+    analytics = []
+    skipped = {name: {'mean': None, 'low': None, 'high': None} for name in KPI_NAMES}
+    for index, point in enumerate(points):
+        params = apply_overrides(base_params, point.items())
+        analytic = estimate(params)
+        analytics.append(analytic)
+        if prune is not None and not prune[0] <= analytic['utilization'] < prune[1]:
+            analytic['pruned'] = True
+            summaries[index] = skipped
+            continue
+        key = point_key(params, replications, minutes, seed)
+        cached = load_point(cache_dir, key) if cache_dir else None
+        if cached is not None and 'replications' in cached:
+            summaries[index] = summarize(cached['replications'], level)
+        else:
+            pending[index] = (params, key)
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_replication, params, minutes, s): (index, i)
+                       for index, (params, key) in pending.items() for i, s in enumerate(seeds)}
+            results = {index: [None] * replications for index in pending}
+            remaining = {index: replications for index in pending}
+            for future in as_completed(futures):
+                index, i = futures[future]
+                results[index][i] = future.result()
+                remaining[index] -= 1
+                if remaining[index] == 0:
+                    params, key = pending[index]
+                    runs = results.pop(index)
+                    summaries[index] = summarize(runs, level)
+                    if cache_dir:
+                        save_point(cache_dir, key, {'point': points[index], 'params': params, 'replications': runs})
+
+    return [tidy_row(point, summaries[index], analytics[index]) for index, point in enumerate(points)]
+
+
+def write_csv(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def pareto_front(rows, minimize='avg_wait_mean', maximize='profit_mean'):
+    """Rows not dominated by another row with lower-or-equal ``minimize`` and higher-or-equal ``maximize``."""
+    front = []
+    best = None
+    rows = [row for row in rows if row[minimize] is not None and row[maximize] is not None]
+    for row in sorted(rows, key=lambda r: (r[minimize], -r[maximize])):
+        if best is None or row[maximize] > best:
+            front.append(row)
+            best = row[maximize]
+    return front
+
+
+def pivot(rows, x, y, value):
+    """Arrange ``value`` on an ``x`` by ``y`` grid for a heatmap; returns ``(xs, ys, grid)``.
+
+    Rows sharing an (x, y) cell, e.g. when more than two parameters were swept, are averaged;
+    pruned points leave their cell empty.
+    """
+    xs = sorted({row[x] for row in rows})
+    ys = sorted({row[y] for row in rows})
+    cells = {}
+    for row in rows:
+        if row[value] is None:
+            continue
+        cells.setdefault((row[x], row[y]), []).append(row[value])
+    grid = [[sum(cells[(xv, yv)]) / len(cells[(xv, yv)]) if (xv, yv) in cells else None for xv in xs]
+            for yv in ys]
+    return xs, ys, grid
+
+
+def sweep_figures(rows, x, y, wait='avg_wait_mean', profit='profit_mean'):
+    """Plotly figures of a sweep: wait and profit heatmaps over ``x`` by ``y`` and the wait/profit Pareto front."""
+    import plotly.graph_objs as go
+
+    figures = []
+    for value, title in ((wait, 'Average wait (minutes)'), (profit, 'Profit ($)')):
+        xs, ys, grid = pivot(rows, x, y, value)
+        fig = go.Figure(go.Heatmap(x=xs, y=ys, z=grid, colorbar=dict(title=title)))
+        fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+        figures.append(fig)
+
+    front = pareto_front(rows, wait, profit)
+    labels = [', '.join(f'{name}={row[name]}' for name in (x, y)) for row in rows]
+    fig = go.Figure([
+        go.Scatter(x=[row[wait] for row in rows], y=[row[profit] for row in rows], mode='markers',
+                   text=labels, name='Scenarios', marker=dict(color='#90a4ae')),
+        go.Scatter(x=[row[wait] for row in front], y=[row[profit] for row in front], mode='lines+markers',
+                   name='Pareto front', line=dict(color='#2196F3', width=2)),
+    ])
+    fig.update_layout(title='Wait time vs profit', xaxis_title='Average wait (minutes)', yaxis_title='Profit ($)')
+    figures.append(fig)
+    return figures
+
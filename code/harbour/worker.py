@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class SimulationWorker:
+    """Advances a simulation in a background thread, independently of whoever displays it.
+
+    ``rate`` is the target speed in simulated minutes per wall-clock second; ``None`` runs as fast
+    as possible. The simulation is advanced in batches of at most ``max_batch`` minutes, each under
+    ``lock``, so readers holding the same lock always see a consistent state and never wait long.
+    Metrics are sampled every ``sample_every`` simulated minutes whatever the speed.
+
+    With ``checkpoint``, a function of the simulation (e.g. ``harbour.checkpoint.save_checkpoint``
+    bound to a path), it is called under ``lock`` at most every ``checkpoint_every`` wall-clock
+    seconds while the simulation advances, and once more when the worker stops.
+    """
+
+    def __init__(self, sim, lock=None, rate=None, sample_every=1, max_batch=1000, checkpoint=None,
+                 checkpoint_every=30.0):
+        self.sim = sim
+        self.lock = lock or threading.Lock()
+        self.rate = rate
+        self.sample_every = sample_every
+        self.max_batch = max_batch
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='harbour-simulation', daemon=True)
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def set_rate(self, rate):
+        """Change the target speed (``None``: unthrottled) while running."""
+        self.rate = rate
+        self._wake.set()
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if wait and self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            self._advance()
+        finally:
+            if self.checkpoint is not None:
+                with self.lock:
+                    self.checkpoint(self.sim)
+
+    def _advance(self):
+        sim = self.sim
+        owed = 0.0
+        last = last_checkpoint = time.monotonic()
+        while not self._stop.is_set() and not sim.finished:
+            rate = self.rate
+            now = time.monotonic()
+            if rate is None:
+                owed = self.max_batch
+            elif rate > 0:
+                # Do not try to catch up with more than one batch after a stall
+                owed = min(owed + (now - last) * rate, self.max_batch)
+            last = now
+            minutes = min(int(owed), sim.horizon - sim.minute)
+            if minutes < 1:
+                if rate:
+                    self._wake.wait((1 - owed) / rate)
+                else:
+                    # Paused: time spent waiting is not owed once a speed is set again
+                    self._wake.wait()
+                    last = time.monotonic()
+                self._wake.clear()
+                continue
+            with self.lock:
+                sim.run(minutes, sample_every=self.sample_every)
+                if self.checkpoint is not None and now - last_checkpoint >= self.checkpoint_every:
+                    self.checkpoint(sim)
+                    last_checkpoint = now
+            owed -= minutes
@@ -0,0 +1,28 @@
+import math
+
+import pytest
+
+from harbour.analytic import erlang_c, estimate
+
+
+def test_erlang_c_single_server_is_the_load():
+    assert erlang_c(1, 0.7) == pytest.approx(0.7)
+
+
+def test_erlang_c_matches_closed_forms():
+    assert erlang_c(2, 1.0) == pytest.approx(1 / 3)
+    # Direct formula for 10 servers at 80% utilization
+    servers, load = 10, 8.0
+    top = load ** servers / math.factorial(servers) * servers / (servers - load)
+    expected = top / (sum(load ** k / math.factorial(k) for k in range(servers)) + top)
+    assert erlang_c(servers, load) == pytest.approx(expected)
+
+
+def test_erlang_c_is_stable_for_many_servers():
+    assert 0 < erlang_c(500, 480.0) < 1
+
+
+def test_unstable_port_has_infinite_waits():
+    result = estimate(arrival_rate=50)
+    assert not result['stable']
+    assert result['prob_wait'] == 1 and math.isinf(result['avg_wait'])
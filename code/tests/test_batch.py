@@ -0,0 +1,23 @@
+import pytest
+
+from harbour.replications import run_replication
+
+np = pytest.importorskip('numpy')
+from harbour.batch import BatchSimulation
+
+
+def test_batch_engine_agrees_with_the_event_engine():
+    params = {'arrival_rate': 1.5, 'num_berths': 3}
+    batch = BatchSimulation(params, replications=300, seed=1, horizon=3000).run().kpis()
+    runs = [run_replication(params, 3000, seed) for seed in range(100)]
+    for name in ('avg_queue', 'avg_wait', 'avg_ship_wait', 'ships_served', 'avg_utilization', 'total_income',
+                 'profit'):
+        event_mean = sum(run[name] for run in runs) / len(runs)
+        assert float(np.mean(batch[name])) == pytest.approx(event_mean, rel=0.1), name
+
+
+def test_batch_replications_are_reproducible_and_distinct():
+    first = BatchSimulation(replications=4, seed=2, horizon=500).run().kpis()
+    second = BatchSimulation(replications=4, seed=2, horizon=500).run().kpis()
+    assert all((first[name] == second[name]).all() for name in first)
+    assert len(set(first['total_income'].tolist())) > 1
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from harbour import PortSimulation
+from harbour.checkpoint import MAGIC, dumps, loads
+
+
+def busy_port(**overrides):
+    sim = PortSimulation(seed=7, horizon=5000, arrival_rate=2, bad_weather_probability=0.3, **overrides)
+    return sim.run(2000)
+
+
+def test_checkpoint_round_trip_continues_identically():
+    sim = busy_port()
+    restored = loads(dumps(sim))
+    assert restored.snapshot() == sim.snapshot()
+    sim.run(3000)
+    restored.run(3000)
+    assert restored.snapshot() == sim.snapshot()
+
+
+def test_json_snapshot_round_trip_continues_identically():
+    sim = busy_port()
+    restored = PortSimulation.from_snapshot(json.loads(json.dumps(sim.snapshot())))
+    sim.run(3000)
+    restored.run(3000)
+    assert restored.snapshot() == sim.snapshot()
+
+
+def test_fork_without_changes_continues_identically_and_independently():
+    sim = busy_port()
+    branch = sim.fork()
+    branch.run(3000)
+    assert sim.minute == 2000
+    sim.run(3000)
+    assert branch.snapshot() == sim.snapshot()
+
+
+def test_fork_applies_new_inputs_from_the_current_minute():
+    sim = busy_port()
+    branch = sim.fork(num_berths=5, arrival_rate=4)
+    assert branch.minute == sim.minute
+    assert len(branch.berths) == 5 and len(sim.berths) == 3
+    assert branch.waits.count == sim.waits.count
+    branch.run(3000)
+    assert branch.finished and not sim.finished
+
+
+def test_fork_refuses_to_remove_a_busy_berth():
+    sim = busy_port(num_berths=2)
+    assert any(berth is not None for berth in sim.berths) or sim.moving_ships
+    with pytest.raises(ValueError):
+        sim.fork(num_berths=0)
+
+
+def test_corrupt_checkpoint_raises_value_error():
+    data = dumps(busy_port())
+    with pytest.raises(ValueError):
+        loads(data[:len(MAGIC) + 10])
+    with pytest.raises(ValueError):
+        loads(b'not a checkpoint')
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from harbour.cli import main
+
+
+def record(capsys, *args):
+    main(['record', *args])
+    return json.loads(capsys.readouterr().out)
+
+
+def test_resume_defaults_to_the_checkpoint_horizon(tmp_path, capsys):
+    checkpoint = str(tmp_path / 'run.ckpt')
+    record(capsys, '--minutes', '3000', '--seed', '2', '--checkpoint', checkpoint, '--checkpoint-every', '1000')
+    resumed = record(capsys, '--resume', checkpoint)
+    assert resumed['minutes'] == resumed['kpis']['minute'] == 3000
+    extended = record(capsys, '--resume', checkpoint, '--minutes', '4000')
+    assert extended['minutes'] == extended['kpis']['minute'] == 4000
+
+
+def test_resume_refuses_a_horizon_before_the_checkpoint(tmp_path, capsys):
+    checkpoint = str(tmp_path / 'run.ckpt')
+    record(capsys, '--minutes', '1000', '--seed', '2', '--checkpoint', checkpoint)
+    with pytest.raises(SystemExit, match='before the checkpoint'):
+        main(['record', '--resume', checkpoint, '--minutes', '500'])
@@ -0,0 +1,33 @@
+import pytest
+
+from harbour import PortSimulation
+from harbour.replications import run_replication
+
+
+def test_same_seed_gives_the_same_run():
+    assert run_replication(None, 3000, 11) == run_replication(None, 3000, 11)
+    assert run_replication(None, 3000, 11) != run_replication(None, 3000, 12)
+
+
+def test_seeded_run_continues_identically_across_calls():
+    whole = PortSimulation(seed=5, arrival_rate=2).run(3000, sample_every=None)
+    pieces = PortSimulation(seed=5, arrival_rate=2)
+    for minutes in (1, 499, 1000, 1500):
+        pieces.run(minutes, sample_every=None)
+    assert pieces.kpis() == whole.kpis()
+    assert pieces.snapshot(include_series=False) == whole.snapshot(include_series=False)
+
+
+def test_sampling_does_not_change_the_run():
+    sampled = PortSimulation(seed=5, arrival_rate=2).run(3000, sample_every=7)
+    unsampled = PortSimulation(seed=5, arrival_rate=2).run(3000, sample_every=None)
+    assert sampled.kpis() == unsampled.kpis()
+    assert sampled.samples == 3000 // 7 + 1
+
+
+def test_average_wait_is_the_time_average_of_the_queue_wait():
+    sim = PortSimulation(seed=3, arrival_rate=2).run(3000)
+    kpis = sim.kpis()
+    sampled = list(sim.series['wait_time_series'])
+    assert kpis['avg_wait'] == pytest.approx(sum(sampled) / len(sampled), rel=0.01)
+    assert kpis['avg_ship_wait'] == sim.waits.mean
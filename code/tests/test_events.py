@@ -0,0 +1,58 @@
+from harbour import PortSimulation
+from harbour.entities import SERVICE, UNMOORING
+from harbour.events import (ARRIVAL, MAINTENANCE, PILOTAGE_END, SERVICE_END, UNMOORING_END, WEATHER,
+                            EventCalendar)
+
+
+def test_same_minute_events_fire_in_kind_then_scheduling_order():
+    calendar = EventCalendar()
+    calendar.schedule(5, MAINTENANCE)
+    calendar.schedule(5, UNMOORING_END, 1)
+    calendar.schedule(5, ARRIVAL)
+    calendar.schedule(5, SERVICE_END, 0)
+    calendar.schedule(5, PILOTAGE_END, 2)
+    calendar.schedule(5, WEATHER)
+    calendar.schedule(4, MAINTENANCE)
+    order = [calendar.pop()[:3] for _ in range(len(calendar))]
+    assert order == [(4, MAINTENANCE, None), (5, WEATHER, None), (5, ARRIVAL, None), (5, PILOTAGE_END, 2),
+                     (5, UNMOORING_END, 1), (5, SERVICE_END, 0), (5, MAINTENANCE, None)]
+
+
+def test_restored_calendar_keeps_order_and_issues_fresh_tokens():
+    calendar = EventCalendar()
+    tokens = [calendar.schedule(3, ARRIVAL), calendar.schedule(3, ARRIVAL)]
+    restored = EventCalendar(calendar.to_list())
+    assert restored.schedule(3, ARRIVAL) > max(tokens)
+    assert [restored.pop()[3] for _ in range(3)] == [tokens[0], tokens[1], max(tokens) + 1]
+
+
+def single_berth_port():
+    # One 600-minute service at a time and weather redrawn every 100 minutes, at first always good
+    return PortSimulation(seed=1, arrival_rate=1, num_berths=1, containers_small=1000, containers_medium=1000,
+                          containers_large=1000, berth_productivity=100, pilotage_time=30, mooring_time=5,
+                          bad_weather_probability=0, min_weather_duration=100, max_weather_duration=100)
+
+
+def test_bad_weather_freezes_the_phase_and_skips_its_stale_event():
+    sim = single_berth_port()
+    sim.run(200, sample_every=None)
+    berth = sim.berths[0]
+    assert berth.phase == SERVICE and berth.ends_at > 500
+    ends_at, stale_token = berth.ends_at, berth.event
+
+    sim.params['bad_weather_probability'] = 1
+    sim.run(100, sample_every=None)  # the weather turns bad at minute 300
+    assert sim.is_bad_weather
+    assert berth.event is None
+    assert berth.time_left == ends_at - 300
+
+    sim.params['bad_weather_probability'] = 0
+    sim.run(100, sample_every=None)  # and good again at minute 400
+    assert not sim.is_bad_weather
+    assert berth.event != stale_token
+    assert berth.ends_at == ends_at + 100
+
+    sim.run(int(ends_at) + 1 - sim.minute, sample_every=None)
+    assert berth.phase == SERVICE  # the event of the frozen phase was skipped
+    sim.run(100, sample_every=None)
+    assert berth.phase == UNMOORING
@@ -0,0 +1,24 @@
+import pytest
+
+from harbour.engine import ship_priority
+from harbour.entities import LARGE, MEDIUM, SMALL, Ship
+from harbour.queues import ShipQueue
+
+
+def ships(*classes):
+    return [Ship(i, ship_class, float(i)) for i, ship_class in enumerate(classes, 1)]
+
+
+def test_priority_queue_serves_larger_classes_first_and_fifo_within_a_class():
+    queue = ShipQueue(ship_priority, ships(SMALL, LARGE, MEDIUM, SMALL, LARGE, MEDIUM))
+    assert [ship.id for ship in queue] == [2, 5, 3, 6, 1, 4]
+    assert [queue.pop().id for _ in range(len(queue))] == [2, 5, 3, 6, 1, 4]
+
+
+def test_queue_without_priorities_is_fifo():
+    queue = ShipQueue(None, ships(SMALL, LARGE, MEDIUM))
+    queue.append(Ship(4, LARGE, 4.0))
+    assert [queue.pop().id for _ in range(4)] == [1, 2, 3, 4]
+    assert len(queue) == 0
+    with pytest.raises(IndexError):
+        queue.pop()
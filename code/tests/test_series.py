@@ -0,0 +1,29 @@
+from harbour.series import column, minmax_decimate
+
+
+def test_series_within_budget_are_returned_whole():
+    x, (y,) = minmax_decimate(column(range(10)), [column(range(10))], 100)
+    assert x == list(range(10)) and y == list(range(10))
+
+
+def test_decimation_keeps_spikes_and_end_points():
+    n = 100_000
+    x = column(range(n))
+    y = column([0.0] * n)
+    y[31_337] = 50.0
+    y[77_777] = -20.0
+    kept_x, (kept_y,) = minmax_decimate(x, [y], 1000)
+    assert len(kept_x) <= 1000
+    assert kept_x[0] == 0 and kept_x[-1] == n - 1
+    assert max(kept_y) == 50.0 and min(kept_y) == -20.0
+    assert kept_x[kept_y.index(50.0)] == 31_337
+    assert kept_x == sorted(kept_x)
+
+
+def test_decimation_keeps_the_extremes_of_every_series():
+    n = 10_000
+    x = list(range(n))
+    up = [float(i % 997) for i in range(n)]
+    down = [-float(i % 1009) for i in range(n)]
+    _, (kept_up, kept_down) = minmax_decimate(x, [up, down], 200)
+    assert max(kept_up) == max(up) and min(kept_down) == min(down)
@@ -0,0 +1,44 @@
+import csv
+
+import pytest
+
+from harbour import PortSimulation
+from harbour.engine import EVENT_FIELDS, HISTORY_COLUMNS, SAMPLE_FIELDS
+from harbour.sinks import CsvSink, RecordSink, open_sink
+
+
+def recorded_run(samples, events, chunk_rows):
+    with open_sink(str(samples), SAMPLE_FIELDS, chunk_rows) as sink, \
+            open_sink(str(events), EVENT_FIELDS, chunk_rows) as event_sink:
+        sim = PortSimulation(seed=4, arrival_rate=2, horizon=1000, sink=sink, event_sink=event_sink)
+        sim.run(sample_every=10)
+    return sim, sink, event_sink
+
+
+def test_csv_sinks_hold_every_sample_and_event(tmp_path):
+    sim, sink, event_sink = recorded_run(tmp_path / 'samples.csv', tmp_path / 'events.csv', chunk_rows=7)
+    with open(tmp_path / 'samples.csv', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == [name for name, _ in SAMPLE_FIELDS]
+    assert len(rows) - 1 == sink.rows_written == sim.samples
+    for name, index in (('time_series', 0), ('profit_series', 6)):
+        assert [float(row[index]) for row in rows[1:]] == list(sim.series[name])
+    with open(tmp_path / 'events.csv', newline='') as f:
+        events = list(csv.DictReader(f))
+    assert len(events) == event_sink.rows_written == sim.events_processed
+    assert all(event['berth'] for event in events if event['kind'] == 'leave_end')
+
+
+def test_parquet_sink_matches_the_in_memory_series(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    sim, _, _ = recorded_run(tmp_path / 'samples.parquet', tmp_path / 'events.parquet', chunk_rows=16)
+    table = parquet.read_table(tmp_path / 'samples.parquet')
+    assert table.num_rows == sim.samples
+    assert table.column('minute').to_pylist() == list(sim.series[HISTORY_COLUMNS[0]])
+    assert parquet.read_table(tmp_path / 'events.parquet').num_rows == sim.events_processed
+
+
+def test_record_sink_needs_a_chunk_writer():
+    with pytest.raises(TypeError):
+        RecordSink('unused', SAMPLE_FIELDS, 10)
+    assert issubclass(CsvSink, RecordSink)
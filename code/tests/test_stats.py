@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from harbour.stats import mser, t_quantile
+
+
+@pytest.mark.parametrize('df, expected', [(1, 12.706), (2, 4.303), (3, 3.182), (5, 2.571), (10, 2.228),
+                                          (30, 2.042), (100, 1.984)])
+def test_t_quantile_matches_tables(df, expected):
+    assert t_quantile(0.975, df) == pytest.approx(expected, rel=0.01)
+
+
+def test_t_quantile_is_symmetric():
+    assert t_quantile(0.025, 4) == pytest.approx(-t_quantile(0.975, 4))
+    assert t_quantile(0.5, 9) == pytest.approx(0)
+
+
+def test_mser_finds_the_end_of_a_transient():
+    rng = random.Random(3)
+    transient = [10 * (1 - i / 200) + rng.gauss(0, 1) for i in range(200)]
+    steady = [rng.gauss(0, 1) for _ in range(1800)]
+    assert 100 <= mser(transient + steady) <= 250
+
+
+def test_mser_keeps_a_stationary_series():
+    rng = random.Random(3)
+    assert mser([rng.gauss(5, 1) for _ in range(1000)]) < 100
+    assert mser([1.0] * 3) == 0
@@ -0,0 +1,53 @@
+from harbour.store import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl_unless_touched():
+    clock = FakeClock()
+    store = SessionStore(ttl=10, clock=clock)
+    store.put('a', 1)
+    store.put('b', 2)
+    clock.now = 8
+    assert store.get('a') == 1
+    clock.now = 15
+    assert store.get('a') == 1
+    assert store.get('b') is None
+    assert len(store) == 1
+
+
+def test_least_recently_used_entry_goes_first():
+    store = SessionStore(max_sessions=2, clock=FakeClock())
+    store.put('a', 1)
+    store.put('b', 2)
+    store.get('a')
+    store.put('c', 3)
+    assert 'b' not in store
+    assert store.get('a') == 1 and store.get('c') == 3
+
+
+def test_new_keys_are_unique_hex():
+    keys = {SessionStore.new_key() for _ in range(100)}
+    assert len(keys) == 100
+    assert all(len(key) == 32 and int(key, 16) >= 0 for key in keys)
+
+
+def test_evicted_values_are_handed_to_on_evict():
+    clock = FakeClock()
+    evicted = []
+    store = SessionStore(max_sessions=2, ttl=10, clock=clock, on_evict=evicted.append)
+    store.put('a', 1)
+    store.put('b', 2)
+    store.put('c', 3)
+    assert evicted == [1]
+    clock.now = 20
+    assert store.get('b') is None
+    assert sorted(evicted) == [1, 2, 3]
+    store.put('d', 4)
+    assert store.pop('d') == 4 and sorted(evicted) == [1, 2, 3]
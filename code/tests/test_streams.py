@@ -0,0 +1,30 @@
+import random
+
+from harbour import PortSimulation
+from harbour.streams import ArrivalStream
+
+
+def test_arrival_stream_is_increasing_at_the_requested_rate():
+    rate = 300 / 60  # 300 ships per hour, five per minute
+    stream = ArrivalStream(random.Random(1), rate, chunk_size=64)
+    times = [next(stream) for _ in range(30_000)]
+    assert all(a <= b for a, b in zip(times, times[1:]))
+    assert abs(len(times) / times[-1] - rate) < 0.05 * rate
+    per_minute = {}
+    for time in times:
+        per_minute[int(time)] = per_minute.get(int(time), 0) + 1
+    assert max(per_minute.values()) > 1  # several arrivals in one minute
+
+
+def test_arrival_stream_resumes_from_its_buffer():
+    stream = ArrivalStream(random.Random(2), 1.0, chunk_size=16)
+    for _ in range(10):
+        next(stream)
+    resumed = ArrivalStream(random.Random(), 1.0, start=stream.last, buffered=stream.pending())
+    assert [next(resumed) for _ in range(6)] == [next(stream) for _ in range(6)]
+
+
+def test_port_receives_more_than_sixty_ships_an_hour():
+    sim = PortSimulation(seed=3, arrival_rate=120, horizon=600).run(sample_every=None)
+    arrived = sim.ship_id_counter - 1
+    assert 1000 < arrived < 1400
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from harbour import sweep
+from harbour.sweep import run_sweep
+
+GRID = {'num_berths': [2, 3]}
+
+
+def cached_sweep(cache_dir, **kwargs):
+    return run_sweep(GRID, {'arrival_rate': 1.5}, replications=4, minutes=600, workers=1, cache_dir=str(cache_dir),
+                     **kwargs)
+
+
+def test_resumed_sweep_reads_every_point_from_the_cache(tmp_path, monkeypatch):
+    first = cached_sweep(tmp_path)
+    assert len([name for name in os.listdir(tmp_path) if name != 'seed.json']) == len(GRID['num_berths'])
+
+    def fail(*args, **kwargs):
+        raise AssertionError('a cached point was simulated again')
+
+    monkeypatch.setattr(sweep, 'ProcessPoolExecutor', fail)
+    assert cached_sweep(tmp_path) == first  # no --seed: the master seed is taken from the cache
+
+
+def test_cached_points_are_summarized_at_the_requested_level(tmp_path):
+    wide = cached_sweep(tmp_path, level=0.95)
+    narrow = cached_sweep(tmp_path, level=0.5)
+    for wide_row, narrow_row in zip(wide, narrow):
+        assert narrow_row['avg_wait_mean'] == pytest.approx(wide_row['avg_wait_mean'])
+        assert wide_row['avg_wait_low'] < narrow_row['avg_wait_low'] <= narrow_row['avg_wait_mean']